@@ -0,0 +1,227 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import degrees
+from landmarks import build_index
+from loader import peak_memory
+
+# Search engines that can be benchmarked, by name
+ENGINES = ("dict", "compiled", "bidirectional", "landmarks")
+
+FIRST_NAMES = ("James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+               "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+               "Thomas", "Sarah", "Charles", "Karen", "Emma", "Kevin", "Tom", "Cary", "Jack")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Taylor",
+              "Moore", "Jackson", "Martin", "Lee", "Thompson", "White", "Harris", "Bacon", "Hanks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees of separation searches.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="write a synthetic people/movies/stars data set")
+    generate_parser.add_argument("directory")
+    generate_parser.add_argument("--people", type=int, default=100000)
+    generate_parser.add_argument("--movies", type=int, default=30000)
+    generate_parser.add_argument("--cast", type=int, default=6, help="mean number of stars per movie")
+    generate_parser.add_argument("--distribution", choices=("uniform", "powerlaw"), default="powerlaw",
+                                 help="how cast sizes and people's popularity are distributed")
+    generate_parser.add_argument("--exponent", type=float, default=1.0, help="popularity exponent for powerlaw")
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser("run", help="time a fixed random query set on a data set")
+    run_parser.add_argument("directory")
+    run_parser.add_argument("--queries", type=int, default=100)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--engines", default="compiled,bidirectional",
+                            help=f"comma-separated engines out of {', '.join(ENGINES)}")
+    run_parser.add_argument("--loader", choices=("dict", "streaming"), default="streaming",
+                            help="how the CSV files are loaded and timed")
+    run_parser.add_argument("--landmarks", type=int, default=8, help="landmarks to build for the landmarks engine")
+    run_parser.add_argument("--output", help="JSON file to save results to")
+    run_parser.add_argument("--baseline", help="JSON results to compare against")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args.directory, args.people, args.movies, args.cast, args.distribution, args.exponent, args.seed)
+        return
+
+    engines = args.engines.split(",")
+    for engine in engines:
+        if engine not in ENGINES:
+            sys.exit(f"Unknown engine {engine}, expected one of {', '.join(ENGINES)}.")
+    results = run(args.directory, args.queries, args.seed, engines, args.loader, args.landmarks)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results)
+
+
+def generate(directory, num_people, num_movies, cast, distribution, exponent, seed):
+    """
+    Write people.csv, movies.csv and stars.csv to `directory` for a random
+    graph with `num_people` people and `num_movies` movies of mean cast size
+    `cast`. With the "powerlaw" distribution, cast sizes are geometric and
+    person i is chosen with weight 1 / (i + 1) ** exponent; with "uniform",
+    cast sizes are uniform on 1..2 * cast - 1 and people equally likely.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            writer.writerow([str(i + 1), name, str(rng.randint(1920, 2005))])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            writer.writerow([str(1000000 + i), f"Movie {i}", str(rng.randint(1930, 2023))])
+
+    # Cumulative popularity weights, so each pick is one bisection
+    if distribution == "powerlaw":
+        weights = [1 / (i + 1) ** exponent for i in range(num_people)]
+    else:
+        weights = [1] * num_people
+    cumulative = []
+    total = 0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(num_movies):
+            if distribution == "powerlaw":
+                size = 1
+                while rng.random() > 1 / cast:
+                    size += 1
+            else:
+                size = rng.randint(1, 2 * cast - 1)
+            for person in set(rng.choices(range(num_people), cum_weights=cumulative, k=size)):
+                writer.writerow([str(person + 1), str(1000000 + movie)])
+
+
+def run(directory, num_queries, seed, engines, loader, num_landmarks):
+    """
+    Load `directory`, answer the same `num_queries` random pairs with
+    each engine, and return load time, latency percentiles, people explored
+    and peak memory as a JSON-serialisable dictionary.
+    """
+    results = {
+        "directory": directory,
+        "queries": num_queries,
+        "seed": seed,
+        "loader": loader,
+        "python": platform.python_version()
+    }
+
+    start = time.perf_counter()
+    degrees.load_data(directory, cache=False, streaming=loader == "streaming")
+    if degrees.graph is None:
+        degrees.compile_graph()
+    results["load_seconds"] = time.perf_counter() - start
+    results["people"] = degrees.graph.num_people
+    results["movies"] = degrees.graph.num_movies
+
+    if "landmarks" in engines:
+        start = time.perf_counter()
+        degrees.landmarks = build_index(degrees.graph, directory, num_landmarks, 1)
+        results["landmark_build_seconds"] = time.perf_counter() - start
+
+    # Query pairs among people who starred in something
+    rng = random.Random(seed)
+    graph = degrees.graph
+    actors = [person for person in range(graph.num_people) if graph.person_offsets[person + 1] > graph.person_offsets[person]]
+    pairs = [(graph.person_ids[rng.choice(actors)], graph.person_ids[rng.choice(actors)]) for _ in range(num_queries)]
+
+    results["engines"] = dict()
+    lengths = None
+    for engine in engines:
+        latencies = []
+        explored = []
+        engine_lengths = []
+        for source, target in pairs:
+            stats = dict()
+            start = time.perf_counter()
+            path = search(engine, source, target, stats)
+            latencies.append(time.perf_counter() - start)
+            explored.append(stats.get("source_explored", 0) + stats.get("target_explored", 0))
+            engine_lengths.append(None if path is None else len(path))
+
+        # Every engine must agree on the degrees of separation
+        if lengths is None:
+            lengths = engine_lengths
+        elif engine_lengths != lengths:
+            sys.exit(f"Engine {engine} disagrees on path lengths.")
+
+        latencies.sort()
+        results["engines"][engine] = {
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "mean_explored": sum(explored) / len(explored)
+        }
+
+    results["connected"] = sum(1 for length in lengths or [] if length is not None)
+    results["peak_rss_mb"] = peak_memory()
+    return results
+
+
+def search(engine, source, target, stats):
+    """
+    Answer one query with the named engine.
+    """
+    if engine == "dict":
+        return degrees.dict_shortest_path(source, target, stats=stats)
+    elif engine == "bidirectional":
+        return degrees.bidirectional_shortest_path(source, target, stats)
+    elif engine == "landmarks":
+        return degrees.compiled_shortest_path(source, target, stats)
+
+    # Plain compiled search, bypassing any landmark index
+    graph = degrees.graph
+    return graph.shortest_path(graph.person_number(source), graph.person_number(target), stats)
+
+
+def percentile(values, p):
+    """
+    Return the nearest-rank `p`th percentile of sorted `values`.
+    """
+    if not values:
+        return 0
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def compare(baseline, results):
+    """
+    Print the relative change of each timing in `results` against `baseline`.
+    """
+    print("Change against baseline:")
+    pairs = [("load_seconds", baseline.get("load_seconds"), results.get("load_seconds"))]
+    for engine, timings in results["engines"].items():
+        for key, value in timings.items():
+            pairs.append((f"{engine}.{key}", baseline.get("engines", {}).get(engine, {}).get(key), value))
+    for name, old, new in pairs:
+        if old:
+            print(f"  {name}: {old:.3f} -> {new:.3f} ({(new - old) / old * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import random
+import sys
+import time
+
+import degrees
+from util import QueueFrontier, DequeQueueFrontier
+
+QUERIES = 20
+SEED = 0
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark_frontier.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    queries = int(sys.argv[2]) if len(sys.argv) == 3 else QUERIES
+
+    print("Loading data...")
+    degrees.load_data(directory, cache=False)
+    print("Data loaded.")
+
+    # Fixed random query pairs, so both frontiers answer the same searches
+    rng = random.Random(SEED)
+    person_ids = sorted(degrees.people)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(queries)]
+
+    results = dict()
+    for frontier_class in (QueueFrontier, DequeQueueFrontier):
+        start = time.perf_counter()
+        results[frontier_class] = [
+            degrees.dict_shortest_path(source, target, frontier_class)
+            for source, target in pairs
+        ]
+        elapsed = time.perf_counter() - start
+        print(f"{frontier_class.__name__}: {elapsed:.3f}s total, {elapsed / queries * 1000:.2f}ms per query")
+
+    # Both frontiers must find paths of the same length
+    for old, new in zip(results[QueueFrontier], results[DequeQueueFrontier]):
+        if (old is None) != (new is None) or (old is not None and len(old) != len(new)):
+            sys.exit("Frontiers disagree on path length.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import argparse
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import Graph, PeopleView, MoviesView, NamesView
+from landmarks import load_index
+from loader import load_graph
+from nameindex import NameIndex
+from snapshot import load_snapshot, save_snapshot
+from util import Node, DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +18,61 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer-indexed graph compiled from people and movies, or None if not compiled
+graph = None
 
-def load_data(directory):
+# Landmark distance index for the graph, or None if not loaded
+landmarks = None
+
+# Prefix and typo-tolerant name index for the graph, built on first use
+name_index = None
+
+# Ways person_id_for_name can resolve a name shared by several people:
+# prompt for an id, pick whoever starred in the most movies, or give up
+AMBIGUITY_POLICIES = ("ask", "popular", "none")
+
+
+def load_data(directory, cache=True, streaming=False):
     """
     Load data from CSV files into memory.
+
+    If `cache` is true, the compiled graph is also saved as a binary
+    snapshot next to the CSV files. Later loads memory-map the snapshot
+    instead, unless the CSV files have changed, and `people`, `movies`
+    and `names` are then read-only views of the graph.
+
+    If `streaming` is true, the CSV files are read straight into a compact
+    graph by loader.load_graph, reporting progress and dropped rows, and
+    `people`, `movies` and `names` are views of it.
     """
+    global graph, people, movies, names, landmarks, name_index
+
+    # Use the snapshot if it is still up to date
+    if cache:
+        snapshot = load_snapshot(directory)
+        if snapshot is not None:
+            graph = snapshot
+            landmarks = name_index = None
+            people, movies, names = PeopleView(graph), MoviesView(graph), NamesView(graph)
+            return
+
+    # Build the graph without dictionaries for very large star tables
+    if streaming:
+        graph, report = load_graph(directory)
+        landmarks = name_index = None
+        people, movies, names = PeopleView(graph), MoviesView(graph), NamesView(graph)
+        if cache:
+            try:
+                save_snapshot(graph, directory)
+            except OSError:
+                pass
+        return
+
+    # Search the dictionaries until compiled, and start from empty ones if views of an earlier graph are loaded
+    graph = landmarks = name_index = None
+    if not isinstance(people, dict):
+        people, movies, names = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -45,31 +101,109 @@ def load_data(directory):
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
+            if row["person_id"] in people and row["movie_id"] in movies:
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+
+    # Save a snapshot for the next load, if the directory is writable
+    if cache:
+        try:
+            save_snapshot(compile_graph(), directory)
+        except OSError:
+            pass
+
+
+def compile_graph():
+    """
+    Compile `people` and `movies` into an integer-indexed graph,
+    which shortest_path then searches instead of the dictionaries.
+    """
+    global graph, landmarks, name_index
+    graph = Graph.from_dicts(people, movies)
+    landmarks = name_index = None
+    return graph
+
+
+def load_landmarks(directory):
+    """
+    Load the landmark index built by landmarks.py for `directory`, which
+    shortest_path then uses to prune its search. Returns the index, or
+    None if there is no up-to-date index.
+    """
+    global landmarks
+    if graph is None:
+        compile_graph()
+    landmarks = load_index(directory, graph)
+    return landmarks
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two person ids from the landmark index, with upper None if unknown,
+    or None if the landmarks show they are not connected.
+    """
+    return landmarks.bounds(person_number(source), person_number(target))
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Find degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once and report people explored per side")
+    parser.add_argument("--histogram", action="store_true",
+                        help="print how many people are at each degree of separation from one person")
+    parser.add_argument("--streaming", action="store_true",
+                        help="load the CSV files straight into the compiled graph, reporting progress")
+    parser.add_argument("--ambiguous", choices=AMBIGUITY_POLICIES, default="ask",
+                        help="how to choose between people who share a name")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="use the index built by landmarks.py for distance bounds and a pruned search")
+    args = parser.parse_args()
+    directory = args.directory
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, streaming=args.streaming)
+    if graph is None:
+        compile_graph()
+    if args.landmarks and load_landmarks(directory) is None:
+        sys.exit("No up-to-date landmark index, run landmarks.py first.")
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    source = person_id_for_name(name, args.ambiguous)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(person_not_found(name))
+
+    # Distribution of degrees of separation from the source
+    if args.histogram:
+        histogram = shortest_path_tree(source).histogram()
+        reachable = sum(histogram.values())
+        for degrees, count in histogram.items():
+            print(f"{degrees}: {count} people")
+        print(f"{reachable} of {len(people)} people connected.")
+        return
+
+    name = input("Name: ")
+    target = person_id_for_name(name, args.ambiguous)
     if target is None:
-        sys.exit("Person not found.")
-
-    path = shortest_path(source, target)
+        sys.exit(person_not_found(name))
+
+    # Instant estimate from the landmark index
+    if landmarks is not None:
+        bounds = distance_bounds(source, target)
+        if bounds is None:
+            sys.exit("Not connected.")
+        lower, upper = bounds
+        print(f"Between {lower} and {upper if upper is not None else 'unknown'} degrees of separation.")
+
+    if args.bidirectional:
+        stats = dict()
+        path = bidirectional_shortest_path(source, target, stats)
+        print(f"Explored {stats['source_explored']} people from source, {stats['target_explored']} from target.")
+    else:
+        path = shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -92,15 +226,33 @@ def shortest_path(source, target):
     If no possible path, returns None.
     """
 
+    # Search the compiled graph if available
+    if graph is not None:
+        return compiled_shortest_path(source, target)
+    return dict_shortest_path(source, target)
+
+
+def dict_shortest_path(source, target, frontier_class=DequeQueueFrontier, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching `people` and `movies`
+    with a frontier of type `frontier_class`.
+
+    If `stats` is a dictionary, the number of explored states is stored
+    in stats["source_explored"]. If no possible path, returns None.
+    """
+
     # Track number of explored states
     num_explored = 0
+    if stats is not None:
+        stats["source_explored"] = num_explored
 
     # Initialise an empty explored set
     explored = set()
 
     # Initialise frontier to starting poisition
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = frontier_class()
     frontier.add(start)
 
     # If source name same as target name, where path is an empty list
@@ -117,6 +269,8 @@ def shortest_path(source, target):
         # Choose a node from the frontier
         node = frontier.remove()
         num_explored += 1
+        if stats is not None:
+            stats["source_explored"] = num_explored
 
         # Mark node as explored
         explored.add(node.state)
@@ -139,14 +293,95 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def compiled_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching the compiled graph.
+
+    Raises KeyError for an unknown id. If no possible path, returns None.
+    """
+    source, target = person_number(source), person_number(target)
+    if landmarks is not None:
+        return path_ids(landmarks.shortest_path(graph, source, target, stats))
+    return path_ids(graph.shortest_path(source, target, stats))
+
+
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching the compiled graph
+    from both ends at once. The graph is compiled first if needed.
+
+    If `stats` is a dictionary, the number of people explored from
+    each side is recorded in it. Raises KeyError for an unknown id.
+    If no possible path, returns None.
+    """
+    if graph is None:
+        compile_graph()
+    if landmarks is not None and distance_bounds(source, target) is None:
+        return None
+    path = graph.bidirectional_path(person_number(source), person_number(target), stats)
+    return path_ids(path)
+
+
+def shortest_path_tree(source):
+    """
+    Returns a ShortestPathTree of every person reachable from the person
+    with id `source`, found in one breadth-first search of the compiled graph.
+    Paths from the source then follow from tree_path. The graph is compiled
+    first if needed.
+    """
+    if graph is None:
+        compile_graph()
+    return graph.shortest_path_tree(person_number(source))
+
+
+def tree_path(tree, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs from the
+    source of `tree` to the person with id `target`, in time proportional
+    to the path length. If no possible path, returns None.
+    """
+    return path_ids(tree.path_to(person_number(target)))
+
+
+def person_number(person_id):
+    """
+    Returns the compiled graph's integer id for a person id,
+    raising KeyError if the person is unknown.
+    """
+    person = graph.person_number(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    return person
+
+
+def path_ids(path):
+    """
+    Converts a compiled graph path of (movie, person) integers
+    to (movie_id, person_id) pairs, passing None through.
+    """
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+
+def person_id_for_name(name, policy="ask"):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    `policy` is one of AMBIGUITY_POLICIES: "ask" prompts for the intended
+    id, "popular" picks the person with the most movies (then lowest id),
+    and "none" returns None, so that batch jobs never block on input.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and policy == "popular":
+        return min(person_ids, key=lambda person_id: (-len(people[person_id]["movies"]), person_id))
+    elif len(person_ids) > 1 and policy == "none":
+        return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
@@ -165,6 +400,37 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(name, limit=10):
+    """
+    Returns up to `limit` candidate people for a possibly partial or
+    misspelt name, ranked exact matches first, then prefix matches, then
+    close spellings. Each candidate is a dictionary of id, name, birth,
+    number of movies and edit distance.
+    """
+    global name_index
+    if graph is None:
+        compile_graph()
+    if name_index is None:
+        name_index = NameIndex(graph)
+    return name_index.search(name, limit)
+
+
+def person_not_found(name):
+    """
+    Returns a message for a name that could not be resolved,
+    suggesting close matches if the name is unknown.
+    """
+    if name.lower() in names:
+        return "Person not found."
+    suggestions = [
+        f"{candidate['name']} ({candidate['birth'] or 'unknown'})"
+        for candidate in find_people(name, 5)
+    ]
+    if not suggestions:
+        return "Person not found."
+    return "Person not found. Did you mean: " + ", ".join(suggestions) + "?"
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -0,0 +1,414 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Mapping
+
+
+class Graph():
+    """
+    Compiled people/movies graph with dense integer ids.
+
+    People and movies are numbered 0..n-1 in sorted IMDB id order.
+    Adjacency is stored in compressed sparse row form: the movies of
+    person i are person_movies[person_offsets[i]:person_offsets[i + 1]],
+    and the stars of movie m are movie_stars[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 person_offsets, person_movies,
+                 movie_ids, movie_titles, movie_years,
+                 movie_offsets, movie_stars,
+                 name_keys=None, name_people=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Lowercase names in sorted order, with the person each belongs to
+        if name_keys is None:
+            order = sorted(range(len(person_names)), key=lambda i: (person_names[i].lower(), i))
+            name_keys = [person_names[i].lower() for i in order]
+            name_people = array("i", order)
+        self.name_keys = name_keys
+        self.name_people = name_people
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Compile the `people` and `movies` dictionaries built by
+        degrees.load_data into a graph. Stars naming a person or movie
+        missing from the dictionaries are left out.
+        """
+        # Number people and movies in sorted id order, so ids can be found by bisection
+        person_ids = sorted(people)
+        movie_ids = sorted(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # Build person -> movies rows
+        person_offsets = array("q", [0])
+        person_movies = array("i")
+        for person_id in person_ids:
+            person_movies.extend(sorted(movie_index[movie_id] for movie_id in people[person_id]["movies"]
+                                        if movie_id in movie_index))
+            person_offsets.append(len(person_movies))
+
+        # Build movie -> stars rows
+        movie_offsets = array("q", [0])
+        movie_stars = array("i")
+        for movie_id in movie_ids:
+            movie_stars.extend(sorted(person_index[person_id] for person_id in movies[movie_id]["stars"]
+                                      if person_id in person_index))
+            movie_offsets.append(len(movie_stars))
+
+        return cls(
+            person_ids,
+            [people[person_id]["name"] for person_id in person_ids],
+            [people[person_id]["birth"] for person_id in person_ids],
+            person_offsets, person_movies,
+            movie_ids,
+            [movies[movie_id]["title"] for movie_id in movie_ids],
+            [movies[movie_id]["year"] for movie_id in movie_ids],
+            movie_offsets, movie_stars
+        )
+
+    @property
+    def num_people(self):
+        return len(self.person_offsets) - 1
+
+    @property
+    def num_movies(self):
+        return len(self.movie_offsets) - 1
+
+    def person_number(self, person_id):
+        """
+        Return the integer id of an IMDB person id, or None if unknown.
+        """
+        return _find(self.person_ids, person_id)
+
+    def movie_number(self, movie_id):
+        """
+        Return the integer id of an IMDB movie id, or None if unknown.
+        """
+        return _find(self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """
+        Return the integer ids of everyone whose lowercase name is `name`.
+        """
+        start = bisect_left(self.name_keys, name)
+        end = bisect_right(self.name_keys, name, start)
+        return self.name_people[start:end]
+
+    def movies_for(self, person):
+        """
+        Return the integer ids of the movies a person starred in.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """
+        Return the integer ids of the people who starred in a movie.
+        """
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Breadth-first search from integer person `source` to `target`.
+
+        Returns the shortest list of (movie, person) integer pairs
+        connecting them, or None if there is no path.
+        If `stats` is a dictionary, the number of people expanded
+        is stored in stats["source_explored"].
+        """
+        if stats is not None:
+            stats["source_explored"] = 0
+        if source == target:
+            return []
+
+        # Parent person and connecting movie of every reached person, -1 if unreached
+        parent_person = array("i", [-1]) * self.num_people
+        parent_movie = array("i", [-1]) * self.num_people
+        parent_person[source] = source
+
+        # Each movie only needs expanding once, by the first person to reach it
+        expanded_movies = bytearray(self.num_movies)
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        frontier = deque([source])
+        while frontier:
+            person = frontier.popleft()
+            if stats is not None:
+                stats["source_explored"] += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if expanded_movies[movie]:
+                    continue
+                expanded_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if parent_person[star] != -1:
+                        continue
+                    parent_person[star] = person
+                    parent_movie[star] = movie
+
+                    # Check for goal before adding to frontier
+                    if star == target:
+                        return trace_path(parent_person, parent_movie, source, target)
+                    frontier.append(star)
+
+        return None
+
+    def shortest_path_tree(self, source):
+        """
+        Breadth-first search from integer person `source` to everyone
+        reachable, returning a ShortestPathTree of distances and parents.
+        """
+        distance = array("i", [-1]) * self.num_people
+        parent_person = array("i", [-1]) * self.num_people
+        parent_movie = array("i", [-1]) * self.num_people
+        expanded_movies = bytearray(self.num_movies)
+        distance[source] = 0
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        frontier = deque([source])
+        while frontier:
+            person = frontier.popleft()
+            level = distance[person] + 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if expanded_movies[movie]:
+                    continue
+                expanded_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if distance[star] != -1:
+                        continue
+                    distance[star] = level
+                    parent_person[star] = person
+                    parent_movie[star] = movie
+                    frontier.append(star)
+
+        return ShortestPathTree(source, distance, parent_person, parent_movie)
+
+    def bidirectional_path(self, source, target, stats=None):
+        """
+        Bidirectional breadth-first search between integer people
+        `source` and `target`, expanding a whole level of whichever side
+        has the smaller frontier until the two searches meet.
+
+        Returns the shortest list of (movie, person) integer pairs
+        connecting them, or None if there is no path.
+        If `stats` is a dictionary, the number of people expanded from each
+        side is stored in stats["source_explored"] and stats["target_explored"].
+        """
+        explored = [0, 0]
+        if source == target:
+            if stats is not None:
+                stats["source_explored"], stats["target_explored"] = explored
+            return []
+
+        # Per side (0 searches from source, 1 from target): distance, parent person and movie
+        distance = [array("i", [-1]) * self.num_people for _ in range(2)]
+        parent_person = [array("i", [-1]) * self.num_people for _ in range(2)]
+        parent_movie = [array("i", [-1]) * self.num_people for _ in range(2)]
+        expanded_movies = [bytearray(self.num_movies) for _ in range(2)]
+        distance[0][source] = 0
+        distance[1][target] = 0
+        frontiers = [[source], [target]]
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        meet = None
+        while frontiers[0] and frontiers[1] and meet is None:
+
+            # Expand one full level of the smaller frontier
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            dist, other_dist = distance[side], distance[1 - side]
+            parents, movies, expanded = parent_person[side], parent_movie[side], expanded_movies[side]
+            best = None
+            next_frontier = []
+            for person in frontiers[side]:
+                explored[side] += 1
+                level = dist[person] + 1
+                for i in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if expanded[movie]:
+                        continue
+                    expanded[movie] = 1
+                    for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if dist[star] != -1:
+                            continue
+                        dist[star] = level
+                        parents[star] = person
+                        movies[star] = movie
+                        next_frontier.append(star)
+
+                        # Keep the meeting person closest to the other side's start
+                        if other_dist[star] != -1 and (best is None or other_dist[star] < best):
+                            best = other_dist[star]
+                            meet = star
+            frontiers[side] = next_frontier
+
+        if stats is not None:
+            stats["source_explored"], stats["target_explored"] = explored
+        if meet is None:
+            return None
+
+        # Stitch the source half and the reversed target half at the meeting person
+        path = trace_path(parent_person[0], parent_movie[0], source, meet)
+        person = meet
+        while person != target:
+            path.append((parent_movie[1][person], parent_person[1][person]))
+            person = parent_person[1][person]
+        return path
+
+
+class ShortestPathTree():
+    """
+    Result of a single-source breadth-first search: the distance of every
+    person from `source` (-1 if unreachable) and the parent person and
+    movie through which each was first reached.
+    """
+    def __init__(self, source, distance, parent_person, parent_movie):
+        self.source = source
+        self.distance = distance
+        self.parent_person = parent_person
+        self.parent_movie = parent_movie
+
+    def path_to(self, target):
+        """
+        Return the shortest list of (movie, person) integer pairs from
+        the source to `target` by walking parents, or None if unreachable.
+        """
+        if self.distance[target] == -1:
+            return None
+        return trace_path(self.parent_person, self.parent_movie, self.source, target)
+
+    def histogram(self):
+        """
+        Return a dictionary mapping each degree of separation to the number
+        of people at that distance from the source, including the source at 0.
+        """
+        counts = dict()
+        for d in self.distance:
+            if d != -1:
+                counts[d] = counts.get(d, 0) + 1
+        return dict(sorted(counts.items()))
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a graph with the same shape as degrees.people:
+    person_id -> {"name", "birth", "movies" (a set of movie_ids)}.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        person = self.graph.person_number(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": self.graph.person_names[person],
+            "birth": self.graph.person_births[person],
+            "movies": {self.graph.movie_ids[movie] for movie in self.graph.movies_for(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return self.graph.num_people
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a graph with the same shape as degrees.movies:
+    movie_id -> {"title", "year", "stars" (a set of person_ids)}.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        movie = self.graph.movie_number(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": self.graph.movie_titles[movie],
+            "year": self.graph.movie_years[movie],
+            "stars": {self.graph.person_ids[person] for person in self.graph.stars_for(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return self.graph.num_movies
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a graph with the same shape as degrees.names:
+    lowercase name -> set of person_ids.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        people = self.graph.people_named(name)
+        if not len(people):
+            raise KeyError(name)
+        return {self.graph.person_ids[person] for person in people}
+
+    def __iter__(self):
+        previous = None
+        for name in self.graph.name_keys:
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def _find(ids, key):
+    """
+    Return the position of `key` in the sorted sequence `ids`, or None.
+    """
+    i = bisect_left(ids, key)
+    if i < len(ids) and ids[i] == key:
+        return i
+    return None
+
+
+def trace_path(parent_person, parent_movie, source, target):
+    """
+    Follow parent links back from `target` to `source`, returning
+    the (movie, person) pairs in path order.
+    """
+    path = []
+    person = target
+    while person != source:
+        path.append((parent_movie[person], person))
+        person = parent_person[person]
+    path.reverse()
+    return path
@@ -0,0 +1,275 @@
+import argparse
+import heapq
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+from array import array
+from collections import deque
+
+from graph import trace_path
+from snapshot import load_snapshot, source_signature
+
+# Landmark index file written next to the CSV files
+INDEX_NAME = "landmarks.index"
+INDEX_MAGIC = b"DEGLMK01"
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = -1
+
+# Graph searched by landmark_distances, inherited by forked workers
+graph = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute landmark distances for degrees queries.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--landmarks", type=int, default=16, help="number of landmark people")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+
+    # Load through degrees, which also writes the snapshot spawned workers load
+    import degrees
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    index = build_index(degrees.graph, args.directory, args.landmarks, args.workers)
+    save_index(index, degrees.graph, args.directory)
+    print(f"Saved {len(index.landmarks)} landmarks to {index_path(args.directory)}")
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from a few landmark people to everyone.
+
+    By the triangle inequality, the distance between s and t lies between
+    max |d(L, s) - d(L, t)| and min d(L, s) + d(L, t) over landmarks L, and
+    s and t are disconnected if some landmark reaches exactly one of them.
+    """
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    def profile(self, person):
+        """
+        Return the tuple of landmark distances of integer person `person`.
+        """
+        return tuple(distance[person] for distance in self.distances)
+
+    def bounds(self, source, target):
+        """
+        Return (lower, upper) bounds on the degrees of separation between
+        integer people `source` and `target`, with upper None if no landmark
+        reaches both, or None if they are known to be disconnected.
+        """
+        return _bounds(self.profile(source), self.profile(target))
+
+    def shortest_path(self, graph, source, target, stats=None):
+        """
+        Breadth-first search from integer person `source` to `target`,
+        skipping people whose distance so far plus their landmark lower
+        bound to the target exceeds the landmark upper bound.
+
+        Returns the shortest list of (movie, person) integer pairs
+        connecting them, or None if there is no path.
+        If `stats` is a dictionary, the number of people expanded
+        is stored in stats["source_explored"].
+        """
+        if stats is not None:
+            stats["source_explored"] = 0
+        if source == target:
+            return []
+
+        target_profile = self.profile(target)
+        bounds = _bounds(self.profile(source), target_profile)
+        if bounds is None:
+            return None
+        upper = bounds[1]
+        if upper is None:
+            return graph.shortest_path(source, target, stats)
+
+        distance = array("i", [-1]) * graph.num_people
+        parent_person = array("i", [-1]) * graph.num_people
+        parent_movie = array("i", [-1]) * graph.num_people
+        expanded_movies = bytearray(graph.num_movies)
+        distance[source] = 0
+
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_stars = graph.movie_stars
+        target_distances = list(zip(self.distances, target_profile))
+
+        frontier = deque([source])
+        while frontier:
+            person = frontier.popleft()
+            if stats is not None:
+                stats["source_explored"] += 1
+            level = distance[person] + 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if expanded_movies[movie]:
+                    continue
+                expanded_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if distance[star] != -1:
+                        continue
+                    distance[star] = level
+                    parent_person[star] = person
+                    parent_movie[star] = movie
+                    if star == target:
+                        return trace_path(parent_person, parent_movie, source, target)
+
+                    # Only keep people who could still lie on a path of length at most upper
+                    if level < upper and not _exceeds(star, target_distances, upper - level):
+                        frontier.append(star)
+
+        return None
+
+
+def _exceeds(person, target_distances, slack):
+    """
+    Return True if some landmark shows the distance from `person` to the
+    target, whose distances are paired with each landmark's distance array,
+    is more than `slack`.
+    """
+    for distance, target_distance in target_distances:
+        d = distance[person]
+        if (d == UNREACHABLE) != (target_distance == UNREACHABLE):
+            return True
+        if d - target_distance > slack or target_distance - d > slack:
+            return True
+    return False
+
+
+def _bounds(source_profile, target_profile):
+    lower = 0
+    upper = None
+    for s, t in zip(source_profile, target_profile):
+        if (s == UNREACHABLE) != (t == UNREACHABLE):
+            return None
+        if s == UNREACHABLE:
+            continue
+        lower = max(lower, abs(s - t))
+        if upper is None or s + t < upper:
+            upper = s + t
+    return lower, upper
+
+
+def load_worker(directory):
+    """
+    Load the snapshot of `directory` in a worker that did not
+    inherit a graph from its parent.
+    """
+    global graph
+    if graph is None:
+        graph = load_snapshot(directory)
+
+
+def choose_landmarks(graph, count):
+    """
+    Return the `count` integer people with the most co-star links,
+    counting each movie's cast size minus one.
+    """
+    degree = array("q", [0]) * graph.num_people
+    for movie in range(graph.num_movies):
+        cast = graph.stars_for(movie)
+        for person in cast:
+            degree[person] += len(cast) - 1
+    return heapq.nlargest(count, range(graph.num_people), key=degree.__getitem__)
+
+
+def landmark_distances(landmark):
+    """
+    Return the breadth-first distance from `landmark` to every person
+    in the worker's graph, as int16 array bytes.
+    """
+    tree = graph.shortest_path_tree(landmark)
+    return array("h", tree.distance).tobytes()
+
+
+def build_index(compiled, directory, count, workers):
+    """
+    Choose `count` landmarks in graph `compiled` of `directory` and
+    compute their distances, one landmark per task in a process pool.
+    """
+    global graph
+    graph = compiled
+    landmarks = choose_landmarks(graph, count)
+    if workers <= 1:
+        results = map(landmark_distances, landmarks)
+    else:
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        context = multiprocessing.get_context(method)
+        with context.Pool(workers, initializer=load_worker, initargs=(directory,)) as pool:
+            results = pool.map(landmark_distances, landmarks)
+    distances = []
+    for data in results:
+        distance = array("h")
+        distance.frombytes(data)
+        distances.append(distance)
+    return LandmarkIndex(landmarks, distances)
+
+
+def index_path(directory):
+    return os.path.join(directory, INDEX_NAME)
+
+
+def save_index(index, graph, directory):
+    """
+    Write `index` to an index file in `directory`, recording the
+    CSV files the graph was built from.
+    """
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": source_signature(directory),
+        "people": graph.num_people,
+        "landmarks": [graph.person_ids[landmark] for landmark in index.landmarks]
+    }).encode("utf-8")
+    path = index_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(INDEX_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * (-f.tell() % 8))
+        for distance in index.distances:
+            distance.tofile(f)
+    os.replace(temporary, path)
+
+
+def load_index(directory, graph):
+    """
+    Memory-map the landmark index in `directory` for `graph`, or return
+    None if there is no index or the CSV files changed since it was built.
+    """
+    try:
+        with open(index_path(directory), "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return None
+            header_length, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+            if (header["byteorder"] != sys.byteorder or header["people"] != graph.num_people
+                    or header["sources"] != source_signature(directory)):
+                return None
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError, KeyError):
+        return None
+
+    start = len(INDEX_MAGIC) + 8 + header_length
+    start += -start % 8
+    size = graph.num_people * 2
+    distances = [
+        data[start + i * size:start + (i + 1) * size].cast("h")
+        for i in range(len(header["landmarks"]))
+    ]
+    landmarks = [graph.person_number(person_id) for person_id in header["landmarks"]]
+    return LandmarkIndex(landmarks, distances)
+
+
+if __name__ == "__main__":
+    main()
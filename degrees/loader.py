@@ -0,0 +1,166 @@
+import csv
+import itertools
+import os
+import sys
+import time
+from array import array
+
+from graph import Graph
+from snapshot import StringTable
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Number of stars.csv rows read between progress reports
+CHUNK_SIZE = 1_000_000
+
+
+def load_graph(directory, progress=sys.stderr, chunk_size=CHUNK_SIZE):
+    """
+    Build a graph straight from the CSV files in `directory` without
+    keeping any rows as dictionaries.
+
+    Ids are interned to integers as rows are read, and stars.csv is read
+    in chunks of `chunk_size` rows into two int32 arrays, which are then
+    bucketed into the graph's adjacency rows. Progress and peak memory are
+    written to `progress` unless it is None.
+
+    Returns (graph, report), where report counts the rows read and the
+    star rows dropped for unknown ids or as duplicates.
+    """
+    start = time.perf_counter()
+    report = dict()
+
+    # Load people and movies, numbering them in file order for now
+    person_ids, person_names, person_births = _read_table(os.path.join(directory, "people.csv"), ("id", "name", "birth"))
+    movie_ids, movie_titles, movie_years = _read_table(os.path.join(directory, "movies.csv"), ("id", "title", "year"))
+    report["people"] = len(person_ids)
+    report["movies"] = len(movie_ids)
+    _progress(progress, start, f"{len(person_ids)} people, {len(movie_ids)} movies")
+
+    # Renumber in sorted id order, as Graph expects, and intern ids to those numbers
+    person_order = sorted(range(len(person_ids)), key=person_ids.__getitem__)
+    movie_order = sorted(range(len(movie_ids)), key=movie_ids.__getitem__)
+    person_index = {person_ids[old]: new for new, old in enumerate(person_order)}
+    movie_index = {movie_ids[old]: new for new, old in enumerate(movie_order)}
+
+    # Stream stars into parallel arrays of integer person and movie ids
+    star_people = array("i")
+    star_movies = array("i")
+    rows = unknown_people = unknown_movies = 0
+    path = os.path.join(directory, "stars.csv")
+    size = os.path.getsize(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        person_column, movie_column = header.index("person_id"), header.index("movie_id")
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                break
+            for row in chunk:
+                person = person_index.get(row[person_column])
+                movie = movie_index.get(row[movie_column])
+                if person is None:
+                    unknown_people += 1
+                elif movie is None:
+                    unknown_movies += 1
+                else:
+                    star_people.append(person)
+                    star_movies.append(movie)
+            rows += len(chunk)
+            _progress(progress, start, f"{rows} star rows ({f.buffer.tell() * 100 // max(size, 1)}%)")
+    del person_index, movie_index
+
+    report["stars"] = rows
+    report["dropped_unknown_person"] = unknown_people
+    report["dropped_unknown_movie"] = unknown_movies
+
+    # Bucket the star pairs into adjacency rows in both directions
+    person_offsets, person_movies, duplicates = _bucket(star_people, star_movies, len(person_ids))
+    movie_offsets, movie_stars, _ = _bucket(star_movies, star_people, len(movie_ids))
+    del star_people, star_movies
+    report["dropped_duplicate"] = duplicates
+
+    graph = Graph(
+        StringTable.from_strings(person_ids[i] for i in person_order),
+        StringTable.from_strings(person_names[i] for i in person_order),
+        StringTable.from_strings(person_births[i] for i in person_order),
+        person_offsets, person_movies,
+        StringTable.from_strings(movie_ids[i] for i in movie_order),
+        StringTable.from_strings(movie_titles[i] for i in movie_order),
+        StringTable.from_strings(movie_years[i] for i in movie_order),
+        movie_offsets, movie_stars
+    )
+    _progress(progress, start, f"graph built, dropped {unknown_people + unknown_movies} unknown and {duplicates} duplicate star rows")
+    return graph, report
+
+
+def _read_table(path, fields):
+    """
+    Return one list per field of the CSV file at `path`.
+    """
+    columns = tuple([] for _ in fields)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        indexes = [header.index(field) for field in fields]
+        for row in reader:
+            for column, i in zip(columns, indexes):
+                column.append(row[i])
+    return columns
+
+
+def _bucket(keys, values, count):
+    """
+    Group parallel arrays `keys` and `values` into compressed sparse rows
+    over `count` keys, each row sorted with duplicates removed.
+
+    Returns (offsets, values, number of duplicates removed).
+    """
+    # Count the values of each key, then fill each row from its start position
+    offsets = array("q", [0]) * (count + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    position = array("q", offsets)
+    rows = array("i", [0]) * len(keys)
+    for key, value in zip(keys, values):
+        rows[position[key]] = value
+        position[key] += 1
+    del position
+
+    # Sort and deduplicate each row in place
+    compact_offsets = array("q", [0]) * (count + 1)
+    end = 0
+    for i in range(count):
+        row = sorted(set(rows[offsets[i]:offsets[i + 1]]))
+        rows[end:end + len(row)] = array("i", row)
+        end += len(row)
+        compact_offsets[i + 1] = end
+    duplicates = len(rows) - end
+    del rows[end:]
+    return compact_offsets, rows, duplicates
+
+
+def peak_memory():
+    """
+    Return this process's peak resident memory in megabytes,
+    or None where it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _progress(progress, start, message):
+    if progress is None:
+        return
+    memory = peak_memory()
+    memory = f", peak {memory:.0f} MB" if memory is not None else ""
+    print(f"[{time.perf_counter() - start:.1f}s{memory}] {message}", file=progress, flush=True)
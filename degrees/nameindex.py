@@ -0,0 +1,164 @@
+from array import array
+from bisect import bisect_left
+
+# Edit distance allowed by typo-tolerant lookups
+MAX_DISTANCE = 2
+
+
+class NameIndex():
+    """
+    Lookup of people by lowercase name prefix or approximate spelling,
+    over the sorted name table of a compiled graph.
+
+    Approximate lookup uses a trigram index: a name within edit distance d
+    of the query shares at least one of the query's 3d + 1 rarest trigrams,
+    so only those posting lists are read before verifying edit distances.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+        # First position of each distinct name in the graph's name table
+        self.keys = []
+        self.starts = array("i")
+        previous = None
+        for i, key in enumerate(graph.name_keys):
+            if key != previous:
+                self.keys.append(key)
+                self.starts.append(i)
+                previous = key
+        self.starts.append(len(graph.name_keys))
+
+        # Trigram postings over distinct names are built on first fuzzy lookup
+        self.trigrams = None
+
+    def exact(self, name):
+        """
+        Return ranked candidates whose name is exactly `name`, ignoring case.
+        """
+        return self.prefix(name, exact=True)
+
+    def prefix(self, prefix, limit=10, exact=False):
+        """
+        Return up to `limit` ranked candidates whose name starts with `prefix`,
+        ignoring case. If `exact` is true, the whole name must match.
+        """
+        prefix = prefix.lower()
+        i = bisect_left(self.keys, prefix)
+        people = []
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            if exact and self.keys[i] != prefix:
+                break
+            people.extend((0, self.graph.name_people[j]) for j in range(self.starts[i], self.starts[i + 1]))
+            if not exact and len(people) >= limit * 10:
+                break
+            i += 1
+        return self.rank(people, None if exact else limit)
+
+    def fuzzy(self, name, limit=10, max_distance=MAX_DISTANCE):
+        """
+        Return up to `limit` ranked candidates whose name is within
+        `max_distance` edits of `name`, ignoring case.
+        """
+        name = name.lower()
+        if self.trigrams is None:
+            self.trigrams = _trigram_postings(self.keys)
+
+        # Rarest query trigrams first; unknown trigrams have empty postings
+        empty = array("i")
+        query = sorted(set(_trigrams(name)), key=lambda gram: len(self.trigrams.get(gram, empty)))
+        candidates = set()
+        for gram in query[:3 * max_distance + 1]:
+            candidates.update(self.trigrams.get(gram, empty))
+
+        people = []
+        for key in candidates:
+            if abs(len(self.keys[key]) - len(name)) > max_distance:
+                continue
+            distance = edit_distance(name, self.keys[key], max_distance)
+            if distance <= max_distance:
+                people.extend((distance, self.graph.name_people[j]) for j in range(self.starts[key], self.starts[key + 1]))
+        return self.rank(people, limit)
+
+    def search(self, name, limit=10):
+        """
+        Return up to `limit` ranked candidates for `name`: exact matches,
+        then prefix matches, then approximate matches, trying one edit
+        before allowing more since each extra edit reads more postings.
+        """
+        results = []
+        seen = set()
+        for candidate in self.exact(name) + self.prefix(name, limit):
+            if candidate["id"] not in seen:
+                seen.add(candidate["id"])
+                results.append(candidate)
+        if len(results) >= limit:
+            return results[:limit]
+
+        for max_distance in range(1, MAX_DISTANCE + 1):
+            approximate = self.fuzzy(name, limit, max_distance)
+            if approximate:
+                break
+        for candidate in approximate:
+            if candidate["id"] not in seen:
+                seen.add(candidate["id"])
+                results.append(candidate)
+        return results[:limit]
+
+    def rank(self, people, limit):
+        """
+        Turn (distance, person) pairs into candidate dictionaries, ranked by
+        edit distance, then by number of movies, then by name.
+        """
+        graph = self.graph
+        candidates = [
+            {
+                "id": graph.person_ids[person],
+                "name": graph.person_names[person],
+                "birth": graph.person_births[person],
+                "movies": graph.person_offsets[person + 1] - graph.person_offsets[person],
+                "distance": distance
+            }
+            for distance, person in people
+        ]
+        candidates.sort(key=lambda c: (c["distance"], -c["movies"], c["name"], c["id"]))
+        return candidates if limit is None else candidates[:limit]
+
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _trigram_postings(keys):
+    """
+    Map each trigram to an array of the positions of keys containing it.
+    """
+    postings = dict()
+    for i, key in enumerate(keys):
+        for gram in set(_trigrams(key)):
+            if gram not in postings:
+                postings[gram] = array("i")
+            postings[gram].append(i)
+    return postings
+
+
+def edit_distance(a, b, bound):
+    """
+    Return the Levenshtein distance between strings a and b,
+    or bound + 1 as soon as it is known to exceed `bound`.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1])
+            )
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+    return min(previous[-1], bound + 1)
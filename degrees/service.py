@@ -0,0 +1,195 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+# How shared names are resolved, one of the non-interactive degrees.AMBIGUITY_POLICIES
+policy = "none"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer many degrees of separation queries with the data loaded once.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = commands.add_parser("batch", help="answer name pairs from a file or stdin as JSON lines")
+    batch_parser.add_argument("directory", nargs="?", default="large")
+    batch_parser.add_argument("--input", default="-", help="file of tab-separated name pairs, '-' for stdin")
+    batch_parser.add_argument("--output", default="-", help="file to write JSON lines to, '-' for stdout")
+    batch_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    batch_parser.add_argument("--ambiguous", choices=("popular", "none"), default="none",
+                              help="pick the person with most movies for shared names, or report them")
+
+    serve_parser = commands.add_parser("serve", help="answer queries over HTTP with the data kept loaded")
+    serve_parser.add_argument("directory", nargs="?", default="large")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8050)
+    serve_parser.add_argument("--socket", help="listen on this Unix socket path instead of a TCP port")
+    serve_parser.add_argument("--ambiguous", choices=("popular", "none"), default="none",
+                              help="pick the person with most movies for shared names, or report them")
+
+    args = parser.parse_args()
+    global policy
+    policy = args.ambiguous
+
+    # Load data once, before any workers are started
+    print("Loading data...", file=sys.stderr)
+    load(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    if args.command == "batch":
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        with source, output:
+            for result in batch(read_pairs(source), args.directory, args.workers):
+                output.write(json.dumps(result) + "\n")
+    else:
+        serve(args.host, args.port, args.socket)
+
+
+def load(directory):
+    """
+    Load `directory` into the degrees module and compile its graph,
+    unless a graph is already loaded.
+    """
+    if degrees.graph is None:
+        degrees.load_data(directory)
+        if degrees.graph is None:
+            degrees.compile_graph()
+
+
+def read_pairs(lines):
+    """
+    Yield (source name, target name) pairs from tab-separated lines,
+    skipping blank lines.
+    """
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        source, _, target = line.partition("\t")
+        yield source.strip(), target.strip()
+
+
+def resolve(name):
+    """
+    Returns (person_id, error) for a name, where person_id is None and
+    error describes the problem if the name is unknown or ambiguous,
+    with ranked candidates to choose from.
+    """
+    person_id = degrees.person_id_for_name(name, policy)
+    if person_id is not None:
+        return person_id, None
+    if name.lower() in degrees.names:
+        return None, {"error": "ambiguous", "name": name, "candidates": degrees.find_people(name)}
+    return None, {"error": "not found", "name": name, "candidates": degrees.find_people(name, 5)}
+
+
+def query(pair):
+    """
+    Answer one (source name, target name) pair, returning a
+    JSON-serialisable dictionary with the path or an error.
+    """
+    source_name, target_name = pair
+    result = {"source": source_name, "target": target_name}
+    source, error = resolve(source_name)
+    if error is None:
+        target, error = resolve(target_name)
+    if error is not None:
+        result.update(error)
+        return result
+
+    path = degrees.bidirectional_shortest_path(source, target)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+        return result
+
+    result["degrees"] = len(path)
+    result["path"] = [
+        {
+            "movie_id": movie_id,
+            "title": degrees.movies[movie_id]["title"],
+            "person_id": person_id,
+            "name": degrees.people[person_id]["name"]
+        }
+        for movie_id, person_id in path
+    ]
+    return result
+
+
+def batch(pairs, directory, workers):
+    """
+    Answer every pair in `pairs`, yielding results in input order.
+
+    Queries are spread over a process pool. Forked workers share the
+    parent's loaded graph copy-on-write, and a memory-mapped snapshot is
+    shared through the page cache; elsewhere each worker loads `directory`.
+    """
+    if workers <= 1:
+        for pair in pairs:
+            yield query(pair)
+        return
+
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    context = multiprocessing.get_context(method)
+    with context.Pool(workers, initializer=load, initargs=(directory,)) as pool:
+        yield from pool.imap(query, pairs, chunksize=16)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /path?source=NAME&target=NAME with a JSON result.
+    """
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path != "/path" or "source" not in params or "target" not in params:
+            self.send_json(400, {"error": "expected /path?source=NAME&target=NAME"})
+            return
+        self.send_json(200, query((params["source"][0], params["target"][0])))
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket clients have no host address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(host, port, socket_path=None):
+    """
+    Serve queries over HTTP until interrupted, on a Unix socket
+    if `socket_path` is given, otherwise on host and port.
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, QueryHandler)
+        print(f"Listening on {socket_path}", file=sys.stderr)
+    else:
+        server = ThreadingHTTPServer((host, port), QueryHandler)
+        print(f"Listening on http://{host}:{port}", file=sys.stderr)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
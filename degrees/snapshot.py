@@ -0,0 +1,144 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph
+
+# Snapshot file written next to the CSV files
+SNAPSHOT_NAME = "graph.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP1"
+
+# CSV files whose size and modification time invalidate the snapshot
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Integer arrays and string columns stored in the snapshot
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars", "name_people")
+STRINGS = ("person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years", "name_keys")
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob plus
+    an array of offsets, decoding each string only when accessed.
+    """
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array("q", [0])
+        data = bytearray()
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return cls(offsets, bytes(data))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_signature(directory):
+    """
+    Return the size and modification time of each CSV file in `directory`.
+    """
+    signature = dict()
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        signature[filename] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def save_snapshot(graph, directory):
+    """
+    Write `graph` to a snapshot file in `directory`, recording the
+    CSV files it was built from.
+    """
+    # Collect every section as raw bytes, with the typecode to read it back as
+    sections = []
+    for name in ARRAYS:
+        values = getattr(graph, name)
+        sections.append((name, array("q" if name.endswith("offsets") else "i", values)))
+    for name in STRINGS:
+        table = StringTable.from_strings(getattr(graph, name))
+        sections.append((f"{name}.offsets", table.offsets))
+        sections.append((f"{name}.data", array("B", table.data)))
+
+    # Lay sections out at 8-byte aligned offsets after the header
+    layout = dict()
+    position = 0
+    for name, values in sections:
+        position = _align(position)
+        layout[name] = [position, len(values) * values.itemsize, values.typecode]
+        position += len(values) * values.itemsize
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": source_signature(directory),
+        "sections": layout
+    }).encode("utf-8")
+    data_start = _align(len(SNAPSHOT_MAGIC) + 8 + len(header))
+
+    # Write to a temporary file and rename, so readers never see a partial snapshot
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, values in sections:
+            f.seek(data_start + layout[name][0])
+            values.tofile(f)
+    os.replace(temporary, path)
+
+
+def load_snapshot(directory):
+    """
+    Memory-map the snapshot in `directory` and return it as a graph,
+    or return None if there is no snapshot or the CSV files changed since.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            header_length, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+            if header["byteorder"] != sys.byteorder or header["sources"] != source_signature(directory):
+                return None
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # Views into the mapping, so nothing is copied until it is used
+    data_start = _align(len(SNAPSHOT_MAGIC) + 8 + header_length)
+    sections = dict()
+    for name, (offset, length, typecode) in header["sections"].items():
+        start = data_start + offset
+        sections[name] = data[start:start + length].cast(typecode)
+
+    columns = {name: sections[name] for name in ARRAYS}
+    for name in STRINGS:
+        columns[name] = StringTable(sections[f"{name}.offsets"], sections[f"{name}.data"])
+    return Graph(**columns)
+
+
+def _align(position):
+    return (position + 7) // 8 * 8
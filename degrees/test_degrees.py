@@ -0,0 +1,35 @@
+import os
+import shutil
+
+import degrees
+from graph import Graph
+
+SMALL = os.path.join(os.path.dirname(__file__), "small")
+
+
+def dangling_copy(tmp_path):
+    """
+    Copy the small dataset to `tmp_path`, adding a star row whose movie
+    is missing from movies.csv.
+    """
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(os.path.join(SMALL, name), tmp_path / name)
+    with open(tmp_path / "stars.csv", "a", encoding="utf-8") as f:
+        f.write("102,999999\n")
+    return tmp_path
+
+
+def test_load_data_skips_dangling_star(tmp_path):
+    directory = dangling_copy(tmp_path)
+    degrees.load_data(str(directory))
+    assert degrees.graph is not None
+    assert "999999" not in degrees.people["102"]["movies"]
+    assert degrees.shortest_path("102", "129") is not None
+
+
+def test_from_dicts_skips_unknown_ids():
+    people = {"1": {"name": "A", "birth": "", "movies": {"10", "99"}}}
+    movies = {"10": {"title": "M", "year": "", "stars": {"1", "2"}}}
+    graph = Graph.from_dicts(people, movies)
+    assert list(graph.movies_for(graph.person_number("1"))) == [graph.movie_number("10")]
+    assert list(graph.stars_for(graph.movie_number("10"))) == [graph.person_number("1")]
@@ -0,0 +1,202 @@
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from heredity import ENGINES, PROBS, SAMPLES, compute_probabilities, load_data
+
+# Cache of the key each family's outputs were computed with, kept in the output directory
+CACHE_NAME = "cache.json"
+
+# Engines run inside the worker pool; parallel would start a pool of its own
+BATCH_ENGINES = tuple(engine for engine in ENGINES if engine != "parallel")
+
+# Engines whose results depend on the number of samples and the seed
+SAMPLING_ENGINES = ("likelihood", "gibbs")
+
+# Output formats that can be written
+FORMATS = ("json", "csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute gene and trait probabilities for many family files.")
+    parser.add_argument("inputs", nargs="+", help="family CSV files, directories of them, or glob patterns")
+    parser.add_argument("--output", required=True, help="directory to write each family's probabilities to")
+    parser.add_argument("--engine", choices=BATCH_ENGINES, default="exact")
+    parser.add_argument("--formats", default="json", help=f"comma-separated output formats out of {', '.join(FORMATS)}")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="samples for the sampling engines")
+    parser.add_argument("--seed", type=int, help="seed for the sampling engines")
+    parser.add_argument("--force", action="store_true", help="recompute families even if they are unchanged")
+    args = parser.parse_args()
+
+    formats = args.formats.split(",")
+    for output_format in formats:
+        if output_format not in FORMATS:
+            sys.exit(f"Unknown format {output_format}, expected one of {', '.join(FORMATS)}.")
+    families = find_families(args.inputs)
+    if not families:
+        sys.exit("No family files found.")
+
+    report = run_batch(families, args.output, args.engine, formats, args.workers, args.samples, args.seed, args.force)
+    print(f"{report['families']} families: {report['computed']} computed, {report['skipped']} unchanged, "
+          f"{report['failed']} failed", file=sys.stderr)
+    for path, error in report["errors"].items():
+        print(f"  {path}: {error}", file=sys.stderr)
+    if report["failed"]:
+        sys.exit(1)
+
+
+def find_families(inputs):
+    """
+    Return the sorted paths of family CSV files named by `inputs`: each a
+    file, a directory whose .csv files are all included, or a glob pattern,
+    which may use ** to match subdirectories. A file named more than once,
+    through any path, is only returned as it was first named.
+    """
+    paths = dict()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.csv")
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if os.path.isfile(path):
+                paths.setdefault(os.path.realpath(path), path)
+    return sorted(paths.values())
+
+
+def run_batch(families, output, engine="exact", formats=("json",), workers=None, samples=SAMPLES, seed=None,
+              force=False):
+    """
+    Compute probabilities for every family file in `families` with the
+    named engine across `workers` processes, writing each family's results
+    to `output` in each of `formats`, and return a report of what was done.
+
+    A family is skipped when its outputs exist and were computed from the
+    same file content, PROBS and engine settings, the sample count and
+    seed counting only for SAMPLING_ENGINES, unless `force` is true.
+    The keys are kept in CACHE_NAME in `output`, so reruns only compute
+    families that changed. Outputs are named by each file's path relative
+    to the deepest directory containing all of `families`.
+    """
+    os.makedirs(output, exist_ok=True)
+    cache_path = os.path.join(output, CACHE_NAME)
+    cache = dict() if force else _load_cache(cache_path)
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in families])
+    settings = {"engine": engine}
+    if engine in SAMPLING_ENGINES:
+        settings.update(samples=samples, seed=seed)
+
+    # Decide which families changed since their outputs were written
+    pending = []
+    report = {"families": len(families), "computed": 0, "skipped": 0, "failed": 0, "errors": dict()}
+    for path in families:
+        name = os.path.splitext(os.path.relpath(os.path.abspath(path), base))[0]
+        key = cache_key(path, settings)
+        outputs = [os.path.join(output, f"{name}.{output_format}") for output_format in formats]
+        if cache.get(name) == key and all(os.path.exists(target) for target in outputs):
+            report["skipped"] += 1
+        else:
+            pending.append((path, name, key))
+
+    # Save the keys of whatever finished even if the batch is interrupted, so a rerun skips those families
+    tasks = [(path, engine, samples, seed) for path, _, _ in pending]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (path, name, key), (probabilities, error) in zip(pending, pool.map(_family_task, tasks, chunksize=8)):
+                if error is not None:
+                    report["failed"] += 1
+                    report["errors"][path] = error
+                    cache.pop(name, None)
+                    continue
+                write_outputs(os.path.join(output, name), path, key, settings, probabilities, formats)
+                cache[name] = key
+                report["computed"] += 1
+    finally:
+        _save_cache(cache_path, cache)
+    return report
+
+
+def cache_key(path, settings):
+    """
+    Return a hash identifying the results for the family file at `path`,
+    from its content, the current PROBS and the engine `settings`.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read())
+    parameters = {"probs": PROBS, "settings": settings}
+    digest.update(json.dumps(parameters, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_outputs(prefix, source, key, settings, probabilities, formats):
+    """
+    Write `probabilities` to `prefix` with each format's extension: JSON
+    with the source file, cache key and settings, or CSV with one row per
+    person of their gene and trait probabilities.
+    """
+    os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+    if "json" in formats:
+        results = {
+            "source": source,
+            "key": key,
+            "settings": settings,
+            "probabilities": {
+                person: {
+                    "gene": {str(copies): p for copies, p in distributions["gene"].items()},
+                    "trait": {str(trait).lower(): p for trait, p in distributions["trait"].items()}
+                }
+                for person, distributions in probabilities.items()
+            }
+        }
+        _write_atomic(f"{prefix}.json", lambda f: json.dump(results, f, indent=2))
+    if "csv" in formats:
+        def write_csv(f):
+            writer = csv.writer(f)
+            writer.writerow(["name", "gene_2", "gene_1", "gene_0", "trait_true", "trait_false"])
+            for person, distributions in probabilities.items():
+                writer.writerow([
+                    person,
+                    *(distributions["gene"][copies] for copies in (2, 1, 0)),
+                    distributions["trait"][True], distributions["trait"][False]
+                ])
+        _write_atomic(f"{prefix}.csv", write_csv)
+
+
+def _family_task(task):
+    path, engine, samples, seed = task
+
+    # Any failure, running out of memory included, is that family's error and not the batch's
+    try:
+        people = load_data(path)
+        return compute_probabilities(people, engine, samples=samples, seed=seed), None
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}"
+
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+
+def _save_cache(path, cache):
+    _write_atomic(path, lambda f: json.dump(cache, f, indent=2, sort_keys=True))
+
+
+def _write_atomic(path, write):
+    # Write to a temporary file and rename, so an interrupted run never leaves a partial file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", newline="") as f:
+        write(f)
+    os.replace(temporary, path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from heredity import enumerate_probabilities, joint_probability, load_data, normalize, powerset, update
+from inference import exact_probabilities
+
+# Engines that can be benchmarked, by name
+ENGINES = ("joint", "enumerate", "exact")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark heredity inference engines.")
+    parser.add_argument("data", nargs="+", help="family CSV files")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help=f"comma-separated engines out of {', '.join(ENGINES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per engine and family, keeping the fastest")
+    parser.add_argument("--output", help="JSON file to save results to")
+    args = parser.parse_args()
+
+    engines = args.engines.split(",")
+    for engine in engines:
+        if engine not in ENGINES:
+            sys.exit(f"Unknown engine {engine}, expected one of {', '.join(ENGINES)}.")
+    results = {"python": platform.python_version(), "repeat": args.repeat, "families": dict()}
+    for filename in args.data:
+        results["families"][filename] = run(load_data(filename), engines, args.repeat)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def run(people, engines, repeat):
+    """
+    Time each engine on `people`, keeping the fastest of `repeat` runs,
+    and return the times with how far each engine's probabilities are from
+    those of the first engine, which should be 0 for every enumeration.
+    """
+    results = {"people": len(people), "engines": dict()}
+    first = None
+    for engine in engines:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            probabilities = ENGINE_FUNCTIONS[engine](people)
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        if first is None:
+            first = probabilities
+        results["engines"][engine] = {"seconds": best, "difference": difference(first, probabilities)}
+    return results
+
+
+def joint_probabilities(people):
+    """
+    Return each person's probabilities by calling joint_probability and
+    update for every assignment, the way main first computed them.
+    """
+    probabilities = {
+        person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
+        for person in people
+    }
+    names = set(people)
+    for have_trait in powerset(names):
+        if any(people[person]["trait"] is not None and people[person]["trait"] != (person in have_trait)
+               for person in names):
+            continue
+        for one_gene in powerset(names):
+            for two_genes in powerset(names - one_gene):
+                p = joint_probability(people, one_gene, two_genes, have_trait)
+                update(probabilities, one_gene, two_genes, have_trait, p)
+    normalize(probabilities)
+    return probabilities
+
+
+def difference(expected, probabilities):
+    """
+    Return the largest absolute difference between two sets of probabilities.
+    """
+    return max(
+        abs(expected[person][field][value] - probabilities[person][field][value])
+        for person in expected
+        for field in expected[person]
+        for value in expected[person][field]
+    )
+
+
+ENGINE_FUNCTIONS = {
+    "joint": joint_probabilities,
+    "enumerate": enumerate_probabilities,
+    "exact": exact_probabilities
+}
+
+
+if __name__ == "__main__":
+    main()
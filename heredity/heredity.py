@@ -1,6 +1,6 @@
+import argparse
 import csv
 import itertools
-import sys
 
 PROBS = {
 
@@ -37,52 +37,33 @@ PROBS = {
 }
 
 
-def main():
+# Lookup tables built from PROBS by probability_tables, with the PROBS values they were built from
+_tables = None
 
-    # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+# Ways main can compute each person's probabilities
+ENGINES = ("exact", "enumerate", "parallel", "likelihood", "gibbs")
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
-        person: {
-            "gene": {
-                2: 0,
-                1: 0,
-                0: 0
-            },
-            "trait": {
-                True: 0,
-                False: 0
-            }
-        }
-        for person in people
-    }
-
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+# Default number of samples for the sampling engines
+SAMPLES = 100000
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+def main():
 
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+    # Check for proper usage
+    parser = argparse.ArgumentParser(description="Assess the likelihood that each person has a genetic trait.")
+    parser.add_argument("data", help="CSV file with fields name, mother, father, trait")
+    parser.add_argument("--engine", choices=ENGINES, default="exact",
+                        help="exact inference over the family tree, enumeration of every assignment "
+                             "in one process or sharded across processes, or estimation by likelihood "
+                             "weighting or Gibbs sampling")
+    parser.add_argument("--workers", type=int, help="processes for the parallel engine, default one per CPU")
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="samples for the sampling engines")
+    parser.add_argument("--seed", type=int, help="seed for the sampling engines")
+    args = parser.parse_args()
+    people = load_data(args.data)
+
+    # Compute gene and trait probabilities for each person
+    probabilities = compute_probabilities(people, args.engine, args.workers, args.samples, args.seed)
 
     # Print results
     for person in people:
@@ -94,6 +75,124 @@ def main():
                 print(f"    {value}: {p:.4f}")
 
 
+def compute_probabilities(people, engine="exact", workers=None, samples=SAMPLES, seed=None):
+    """
+    Return the gene and trait probability distributions of each person in
+    `people` computed by the named engine, out of ENGINES. `workers` is
+    only used by the parallel engine, `samples` and `seed` by the sampling ones.
+    """
+    if engine == "exact":
+        from inference import exact_probabilities
+        return exact_probabilities(people)
+    elif engine == "enumerate":
+        return enumerate_probabilities(people)
+    elif engine == "parallel":
+        from parallel import parallel_probabilities
+        return parallel_probabilities(people, workers)
+    elif engine == "likelihood":
+        from sampling import likelihood_weighting
+        return likelihood_weighting(people, samples, seed)
+    elif engine == "gibbs":
+        from sampling import gibbs_sampling
+        return gibbs_sampling(people, samples, seed)
+    raise ValueError(f"Unknown engine {engine}, expected one of {', '.join(ENGINES)}")
+
+
+def enumerate_probabilities(people):
+    """
+    Return the gene and trait probability distributions of each person in
+    `people`, by summing the joint probability of every assignment of
+    genes and traits that agrees with the known traits.
+
+    Known traits are fixed up front and unknown ones summed out, so only
+    gene assignments are walked, one at a time from gene_assignments.
+    """
+    tables = evidence_tables(people)
+    gene_sums = enumerate_sums(tables, gene_assignments(len(people)))
+    return probabilities_from_sums(people, gene_sums)
+
+
+def gene_assignments(count, fixed=0, prefix=(0, 0)):
+    """
+    Yield every assignment of gene copies to `count` people as a pair of
+    bitmasks (one_gene, two_genes), bit i set if person i has one or two
+    copies respectively, without building any sets.
+
+    The first `fixed` people keep the assignment given by the bitmask pair
+    `prefix`, so that the assignments can be split into shards.
+    """
+    everyone = ((1 << count) - 1) & ~((1 << fixed) - 1)
+    prefix_one, prefix_two = prefix
+    for two_genes in range(0, 1 << count, 1 << fixed):
+
+        # Walk every subset of the people without two copies, down to the empty set
+        rest = everyone & ~two_genes
+        one_gene = rest
+        while True:
+            yield one_gene | prefix_one, two_genes | prefix_two
+            if not one_gene:
+                break
+            one_gene = (one_gene - 1) & rest
+
+
+def enumerate_sums(tables, assignments):
+    """
+    Return, for each person, the sums of the probabilities of `assignments`
+    of gene copies in which they have 0, 1 and 2 copies, as a list of
+    [zero, one, two] lists. `tables` is from evidence_tables, so each
+    probability already accounts for the known traits.
+    """
+    count = len(tables)
+    people = range(count)
+    gene_sums = [[0, 0, 0] for _ in people]
+    for one_gene, two_genes in assignments:
+
+        # Decode the bitmasks, with a last entry of 0 copies for missing parents
+        genes = [((two_genes >> i) & 1) * 2 + ((one_gene >> i) & 1) for i in people]
+        genes.append(0)
+
+        p = 1
+        for i, (mother, father, table) in enumerate(tables):
+            p *= table[(genes[i] * 3 + genes[mother]) * 3 + genes[father]]
+        for i in people:
+            gene_sums[i][genes[i]] += p
+    return gene_sums
+
+
+def probabilities_from_sums(people, gene_sums):
+    """
+    Return normalized gene and trait probability distributions of each
+    person in `people` from their gene copy sums. An unknown trait's
+    distribution follows from the gene distribution through PROBS, so it
+    never needs to be enumerated.
+    """
+    _, _, trait_table = probability_tables()
+    probabilities = dict()
+    for person, sums in zip(people, gene_sums):
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(sums[copies] * trait_table[copies][True] for copies in range(3))
+            no_trait = sum(sums[copies] * trait_table[copies][False] for copies in range(3))
+        else:
+            has_trait = sum(sums) if trait else 0
+            no_trait = 0 if trait else sum(sums)
+        probabilities[person] = {
+            "gene": {
+                2: sums[2],
+                1: sums[1],
+                0: sums[0]
+            },
+            "trait": {
+                True: has_trait,
+                False: no_trait
+            }
+        }
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
+
+
 def load_data(filename):
     """
     Load gene and trait data from a file into a dictionary.
@@ -139,6 +238,9 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
+    # Look up gene, heredity and trait probabilities rather than recomputing them
+    gene_table, heredity_table, trait_table = probability_tables()
+
     # Initialise joint probability variable
     joint_probability = 1
 
@@ -152,7 +254,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         if not people[name]["mother"] and not people[name]["father"]:
 
             # General probability equals multiple of probability of gene copy and probability of trait (depending on gene copy)
-            joint_probability *= PROBS["gene"][gene_copies_name] * PROBS["trait"][gene_copies_name][name in have_trait]
+            joint_probability *= gene_table[gene_copies_name] * trait_table[gene_copies_name][name in have_trait]
 
         # Else if parents in csv, multiply joint probability by heredity probability
         else:
@@ -162,7 +264,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
             gene_copies_father = gene_copies(people[name]["father"], one_gene, two_genes)
 
             # multiply joint probability by heredity probability and trait probability (depending on trait)
-            joint_probability *= heredity_probability(gene_copies_name, gene_copies_mother, gene_copies_father) * PROBS["trait"][gene_copies_name][name in have_trait]
+            joint_probability *= heredity_table[gene_copies_name][gene_copies_mother][gene_copies_father] * trait_table[gene_copies_name][name in have_trait]
 
     return joint_probability
 
@@ -266,5 +368,88 @@ def parent_probability(gene_copies):
         return (1 - PROBS["mutation"])
 
 
+def inheritance_table():
+    """
+    Return heredity_probability for every combination of gene copies,
+    as a nested list indexed [child][mother][father].
+    """
+    return [
+        [[heredity_probability(child, mother, father) for father in range(3)] for mother in range(3)]
+        for child in range(3)
+    ]
+
+
+def trait_table():
+    """
+    Return the probability of each trait value given gene copies,
+    as a nested list indexed [copies][trait], with False as 0 and True as 1.
+    """
+    return [[PROBS["trait"][copies][False], PROBS["trait"][copies][True]] for copies in range(3)]
+
+
+def probability_tables():
+    """
+    Return (gene, heredity, trait) lookup tables: the unconditional
+    probability of each number of gene copies, inheritance_table and
+    trait_table. They are only recomputed when PROBS has changed.
+    """
+    global _tables
+    gene, trait = PROBS["gene"], PROBS["trait"]
+    key = (
+        gene[0], gene[1], gene[2],
+        trait[0][False], trait[0][True], trait[1][False], trait[1][True], trait[2][False], trait[2][True],
+        PROBS["mutation"]
+    )
+    if _tables is None or _tables[0] != key:
+        _tables = (key, ([PROBS["gene"][copies] for copies in range(3)], inheritance_table(), trait_table()))
+    return _tables[1]
+
+
+def person_tables(people):
+    """
+    Return a list with a (mother, father, table) entry for each person in
+    `people`, giving everything joint_probability needs for that person.
+    Parents are positions in `people`, or len(people) for a parent not in
+    the csv, where callers keep a 0 so such parents have no copies.
+    `table` holds the person's factor of the joint probability for every
+    combination of child copies, mother copies, father copies and trait,
+    at index ((child * 3 + mother) * 3 + father) * 2 + trait.
+    """
+    gene_table, heredity_table, trait_table = probability_tables()
+    index = {person: i for i, person in enumerate(people)}
+    missing = len(people)
+
+    tables = []
+    for person in people:
+        mother, father = people[person]["mother"], people[person]["father"]
+        table = []
+        for child, mother_copies, father_copies, trait in itertools.product(range(3), range(3), range(3), range(2)):
+
+            # Same products as joint_probability, so results match it exactly
+            if not mother and not father:
+                table.append(gene_table[child] * trait_table[child][trait])
+            else:
+                table.append(heredity_table[child][mother_copies][father_copies] * trait_table[child][trait])
+        tables.append((index.get(mother, missing), index.get(father, missing), table))
+    return tables
+
+
+def evidence_tables(people):
+    """
+    Return a list with a (mother, father, table) entry for each person in
+    `people`, like person_tables but with the trait axis gone: a known
+    trait is multiplied in, and an unknown one summed out. `table` is
+    indexed (child * 3 + mother) * 3 + father.
+    """
+    evidence = []
+    for person, (mother, father, table) in zip(people, person_tables(people)):
+        trait = people[person]["trait"]
+        if trait is None:
+            evidence.append((mother, father, [table[i] + table[i + 1] for i in range(0, len(table), 2)]))
+        else:
+            evidence.append((mother, father, table[int(trait)::2]))
+    return evidence
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,211 @@
+import heapq
+
+import numpy as np
+
+from heredity import PROBS, inheritance_table, trait_table
+
+
+def exact_probabilities(people):
+    """
+    Return the gene and trait probability distributions of each person in
+    `people`, as loaded by load_data, in the same form as
+    enumerate_probabilities but without enumerating assignments.
+
+    Each person contributes one factor: the probability of their gene
+    copies given their parents' (or unconditionally, with no parents),
+    times the probability of their known trait. People are eliminated one
+    at a time into a tree of clusters, and messages passed up and back down
+    that tree give every person's gene distribution at once. For family
+    trees without marriages between relatives, clusters hold at most a
+    child and two parents, so the work grows linearly with family size.
+    """
+    names = list(people)
+    factors = family_factors(people, names)
+    order, clusters = build_clusters(factors, len(names))
+    beliefs = pass_messages(order, clusters, factors)
+
+    # Read each person's gene distribution off the cluster that eliminated them
+    traits = np.array(trait_table())
+    probabilities = dict()
+    for i, name in enumerate(names):
+        genes = marginal(beliefs[i], clusters[i]["scope"], [i])
+        genes = genes / genes.sum()
+        trait = people[name]["trait"]
+        if trait is None:
+            has_trait = float(genes @ traits[:, 1])
+        else:
+            has_trait = 1.0 if trait else 0.0
+        probabilities[name] = {
+            "gene": {
+                2: float(genes[2]),
+                1: float(genes[1]),
+                0: float(genes[0])
+            },
+            "trait": {
+                True: has_trait,
+                False: 1 - has_trait
+            }
+        }
+    return probabilities
+
+
+def family_factors(people, names):
+    """
+    Return one (scope, table) factor per person in `names`: the probability
+    of their gene copies given their parents', times the probability of
+    their known trait. `scope` lists the people involved by position in
+    `names`, and `table` has one axis of 3 gene copies per person in it.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    inheritance = np.array(inheritance_table())
+    traits = np.array(trait_table())
+    prior = np.array([PROBS["gene"][copies] for copies in range(3)])
+
+    factors = []
+    for name in names:
+        trait = people[name]["trait"]
+        evidence = np.ones(3) if trait is None else traits[:, int(trait)]
+        child = index[name]
+        mother, father = people[name]["mother"], people[name]["father"]
+        table = inheritance * evidence[:, None, None]
+
+        # No parents in csv, so use the unconditional gene probabilities
+        if not mother and not father:
+            factors.append(([child], prior * evidence))
+            continue
+
+        # A parent missing from the csv counts as having no copies, as in joint_probability
+        mother, father = (parent if parent in index else None for parent in (mother, father))
+        if not mother and not father:
+            factors.append(([child], table[:, 0, 0]))
+        elif not father:
+            factors.append(([child, index[mother]], table[:, :, 0]))
+        elif not mother:
+            factors.append(([child, index[father]], table[:, 0, :]))
+        elif mother == father:
+            factors.append(([child, index[mother]], np.einsum("cmm->cm", table)))
+        else:
+            factors.append(([child, index[mother], index[father]], table))
+    return factors
+
+
+def build_clusters(factors, count):
+    """
+    Choose an elimination order for `count` people, each time eliminating
+    the person with the fewest remaining neighbours, and return
+    (order, clusters) where clusters[i] describes the cluster formed by
+    eliminating person i: its "scope" of people, the original "factors"
+    assigned to it, the "children" clusters whose messages it receives, and
+    the "separator" of people shared with its parent cluster.
+    """
+    neighbours = [set() for _ in range(count)]
+    for scope, _ in factors:
+        for person in scope:
+            neighbours[person].update(scope)
+    for person in range(count):
+        neighbours[person].discard(person)
+
+    # Min-degree order, with stale heap entries skipped as degrees change
+    order = []
+    eliminated = [False] * count
+    heap = [(len(neighbours[person]), person) for person in range(count)]
+    heapq.heapify(heap)
+    while heap:
+        degree, person = heapq.heappop(heap)
+        if eliminated[person] or degree != len(neighbours[person]):
+            continue
+        eliminated[person] = True
+        order.append(person)
+        others = neighbours[person]
+        for other in others:
+            neighbours[other].discard(person)
+            neighbours[other].update(others - {other})
+            heapq.heappush(heap, (len(neighbours[other]), other))
+
+    # Each factor or message goes to the first cluster to eliminate someone in it
+    position = {person: i for i, person in enumerate(order)}
+    clusters = [{"scope": [], "factors": [], "children": [], "separator": []} for _ in range(count)]
+    pending = [[] for _ in range(count)]
+    for f, (scope, _) in enumerate(factors):
+        pending[min(scope, key=position.get)].append(("factor", f))
+    for person in order:
+        cluster = clusters[person]
+        scope = {person}
+        for kind, item in pending[person]:
+            if kind == "factor":
+                cluster["factors"].append(item)
+                scope.update(factors[item][0])
+            else:
+                cluster["children"].append(item)
+                scope.update(clusters[item]["separator"])
+        cluster["scope"] = [person] + sorted(scope - {person})
+        cluster["separator"] = cluster["scope"][1:]
+        if cluster["separator"]:
+            pending[min(cluster["separator"], key=position.get)].append(("message", person))
+    return order, clusters
+
+
+def pass_messages(order, clusters, factors):
+    """
+    Return the belief of every cluster, a table over its scope proportional
+    to the probability of its people's gene copies given all known traits,
+    by passing messages up the cluster tree in elimination order and then
+    back down. Messages are scaled to sum to 1, so large families do not
+    underflow.
+    """
+    local = dict()
+    up = dict()
+    for person in order:
+        cluster = clusters[person]
+        scope = cluster["scope"]
+        table = np.ones([3] * len(scope))
+        for f in cluster["factors"]:
+            table = table * expand(factors[f][1], factors[f][0], scope)
+        local[person] = table
+        for child in cluster["children"]:
+            table = table * expand(up[child], clusters[child]["separator"], scope)
+        if cluster["separator"]:
+            message = marginal(table, scope, cluster["separator"])
+            up[person] = message / message.sum()
+
+    # Each child hears from everything in the cluster except itself, via prefix and suffix products
+    down = dict()
+    beliefs = dict()
+    for person in reversed(order):
+        cluster = clusters[person]
+        scope = cluster["scope"]
+        table = local[person]
+        if person in down:
+            table = table * expand(down[person], cluster["separator"], scope)
+        incoming = [expand(up[child], clusters[child]["separator"], scope) for child in cluster["children"]]
+        prefix = [table]
+        for message in incoming:
+            prefix.append(prefix[-1] * message)
+        suffix = 1
+        for i in reversed(range(len(incoming))):
+            child = cluster["children"][i]
+            message = marginal(prefix[i] * suffix, scope, clusters[child]["separator"])
+            down[child] = message / message.sum()
+            suffix = suffix * incoming[i]
+        beliefs[person] = prefix[-1]
+    return beliefs
+
+
+def expand(table, variables, scope):
+    """
+    Return `table`, with one axis per person in `variables`, reordered and
+    reshaped to broadcast against a table with one axis per person in `scope`.
+    """
+    axes = sorted(range(len(variables)), key=lambda axis: scope.index(variables[axis]))
+    present = set(variables)
+    return np.transpose(table, axes).reshape([3 if person in present else 1 for person in scope])
+
+
+def marginal(table, scope, keep):
+    """
+    Return `table`, with one axis per person in `scope`, summed over
+    everyone not in `keep` and with axes in the order of `keep`.
+    """
+    summed = tuple(axis for axis, person in enumerate(scope) if person not in keep)
+    remaining = [person for person in scope if person in keep]
+    return np.transpose(table.sum(axis=summed), [remaining.index(person) for person in keep])
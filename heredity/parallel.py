@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+
+from heredity import enumerate_sums, evidence_tables, gene_assignments, probabilities_from_sums
+
+# Aim for this many shards per worker, so uneven shards even out
+SHARDS_PER_WORKER = 4
+
+# Tables, family size and people fixed per shard used by workers, set by _init_worker
+tables = None
+count = 0
+fixed = 0
+
+
+def parallel_probabilities(people, workers=None, fixed=None):
+    """
+    Return the same probabilities as enumerate_probabilities, with the
+    gene assignments split into shards by the assignment of the first
+    `fixed` people and the shards enumerated across `workers` processes.
+
+    Each shard returns its own gene copy sums, which are added together
+    before normalizing. By default `workers` is the number of CPUs and
+    `fixed` the fewest people giving SHARDS_PER_WORKER shards per worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    if fixed is None:
+        fixed = 0
+        while 3 ** fixed < workers * SHARDS_PER_WORKER and fixed < len(people):
+            fixed += 1
+    fixed = min(fixed, len(people))
+    family_tables = evidence_tables(people)
+    shards = list(gene_assignments(fixed))
+
+    if workers <= 1:
+        _init_worker(family_tables, len(people), fixed)
+        results = map(_shard_task, shards)
+        gene_sums = _merge(results, len(people))
+    else:
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        context = multiprocessing.get_context(method)
+        with context.Pool(workers, initializer=_init_worker, initargs=(family_tables, len(people), fixed)) as pool:
+            gene_sums = _merge(pool.imap_unordered(_shard_task, shards), len(people))
+    return probabilities_from_sums(people, gene_sums)
+
+
+def _init_worker(shared_tables, shared_count, shared_fixed):
+    global tables, count, fixed
+    tables, count, fixed = shared_tables, shared_count, shared_fixed
+
+
+def _shard_task(prefix):
+    return enumerate_sums(tables, gene_assignments(count, fixed, prefix))
+
+
+def _merge(results, people):
+    """
+    Return the element-wise total of per-shard gene copy sums.
+    """
+    gene_sums = [[0, 0, 0] for _ in range(people)]
+    for shard_sums in results:
+        for total, sums in zip(gene_sums, shard_sums):
+            for copies in range(3):
+                total[copies] += sums[copies]
+    return gene_sums
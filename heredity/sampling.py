@@ -0,0 +1,219 @@
+import numpy as np
+
+from heredity import PROBS, SAMPLES, inheritance_table, probabilities_from_sums, trait_table
+
+# Likelihood weighting samples drawn together, and Gibbs chains and burn-in sweeps
+BATCH_SIZE = 10000
+CHAINS = 1000
+BURN_IN = 50
+
+
+def likelihood_weighting(people, samples=SAMPLES, seed=None, batch_size=BATCH_SIZE, stats=None):
+    """
+    Return estimated gene and trait probability distributions of each
+    person in `people`, as loaded by load_data, in the same form as
+    enumerate_probabilities, from `samples` likelihood-weighted samples.
+
+    Each sample draws everyone's gene copies, parents before children, from
+    PROBS and heredity_probability, and is weighted by the probability of
+    the known traits given those genes. Samples are drawn `batch_size` at a
+    time as NumPy arrays from a generator seeded with `seed`.
+
+    If `stats` is a dictionary, "history" lists for each batch the samples
+    drawn so far and the largest change in any probability it caused, and
+    "ess" the effective sample size left after weighting.
+    """
+    family = Family(people)
+    rng = np.random.default_rng(seed)
+    gene_sums = np.zeros((family.count, 3))
+    total_weight = total_square = 0.0
+    history = []
+    previous = None
+
+    # Keep weights as logarithms and sums relative to the largest weight, so large families do not underflow
+    scale = -np.inf
+    drawn = 0
+    while drawn < samples:
+        size = min(batch_size, samples - drawn)
+        genes = np.zeros((size, family.count + 1), dtype=np.int64)
+        log_weights = np.zeros(size)
+        for person in family.order:
+            genes[:, person] = sample_copies(rng, family.gene_distribution(genes, person))
+            log_weights += np.log(family.evidence[person][genes[:, person]])
+
+        largest = log_weights.max()
+        if largest > scale:
+            rescale = np.exp(scale - largest)
+            gene_sums *= rescale
+            total_weight *= rescale
+            total_square *= rescale ** 2
+            scale = largest
+        weights = np.exp(log_weights - scale)
+        for copies in range(3):
+            gene_sums[:, copies] += weights @ (genes[:, :family.count] == copies)
+        total_weight += weights.sum()
+        total_square += (weights ** 2).sum()
+        drawn += size
+
+        # Track how much the estimate still moves as samples are added
+        estimate = gene_sums / gene_sums.sum(axis=1, keepdims=True)
+        history.append((drawn, float(np.abs(estimate - previous).max()) if previous is not None else None))
+        previous = estimate
+
+    if stats is not None:
+        stats["history"] = history
+        stats["ess"] = float(total_weight ** 2 / total_square) if total_square else 0.0
+    return probabilities_from_sums(people, gene_sums.tolist())
+
+
+def gibbs_sampling(people, samples=SAMPLES, seed=None, chains=CHAINS, burn_in=BURN_IN, stats=None):
+    """
+    Return estimated gene and trait probability distributions of each
+    person in `people`, as loaded by load_data, in the same form as
+    enumerate_probabilities, by Gibbs sampling.
+
+    `chains` independent chains are advanced together as NumPy arrays.
+    Each sweep redraws every person's gene copies given everyone else's,
+    from their own factor, the known trait and their children's factors.
+    After `burn_in` sweeps, the distribution each person is drawn from is
+    averaged over sweeps until about `samples` have been drawn.
+
+    If `stats` is a dictionary, "history" lists after each sweep the
+    samples so far and the largest change in any probability, and "rhat"
+    the largest Gelman-Rubin statistic across chains, which approaches 1
+    as the chains agree.
+    """
+    family = Family(people)
+    rng = np.random.default_rng(seed)
+    sweeps = max(2, -(-samples // chains))
+
+    # Start every chain from a likelihood-weighting style draw, ignoring the evidence
+    genes = np.zeros((chains, family.count + 1), dtype=np.int64)
+    for person in family.order:
+        genes[:, person] = sample_copies(rng, family.gene_distribution(genes, person))
+
+    chain_sums = np.zeros((chains, family.count, 3))
+    chain_squares = np.zeros((chains, family.count, 3))
+    history = []
+    previous = None
+    for sweep in range(burn_in + sweeps):
+        for person in range(family.count):
+            distribution = family.conditional(genes, person)
+            genes[:, person] = sample_copies(rng, distribution)
+            if sweep >= burn_in:
+                chain_sums[:, person] += distribution
+                chain_squares[:, person] += distribution ** 2
+
+        if sweep >= burn_in:
+            kept = sweep - burn_in + 1
+            estimate = chain_sums.sum(axis=0) / (kept * chains)
+            history.append((kept * chains, float(np.abs(estimate - previous).max()) if previous is not None else None))
+            previous = estimate
+
+    if stats is not None:
+        stats["history"] = history
+        stats["rhat"] = gelman_rubin(chain_sums, chain_squares, sweeps)
+    return probabilities_from_sums(people, chain_sums.sum(axis=0).tolist())
+
+
+class Family():
+    """
+    Family tree of `people` as arrays, with people numbered in csv order.
+
+    Gene copies are held in arrays with one extra last column fixed at 0,
+    which parents missing from the csv point to, as in joint_probability.
+    """
+
+    def __init__(self, people):
+        names = list(people)
+        index = {name: i for i, name in enumerate(names)}
+        self.count = len(names)
+        self.prior = np.array([PROBS["gene"][copies] for copies in range(3)])
+        self.inheritance = np.array(inheritance_table())
+        traits = np.array(trait_table())
+
+        self.founder = [not people[name]["mother"] and not people[name]["father"] for name in names]
+        self.mother = [index.get(people[name]["mother"], self.count) for name in names]
+        self.father = [index.get(people[name]["father"], self.count) for name in names]
+        self.evidence = [
+            np.ones(3) if people[name]["trait"] is None else traits[:, int(people[name]["trait"])]
+            for name in names
+        ]
+        self.children = [[] for _ in names]
+        for child in range(self.count):
+            if not self.founder[child]:
+                for parent in {self.mother[child], self.father[child]} - {self.count}:
+                    self.children[parent].append(child)
+        self.order = self._parents_first()
+
+    def _parents_first(self):
+        order = []
+        visited = [False] * self.count
+        for start in range(self.count):
+            stack = [(start, False)]
+            while stack:
+                person, expanded = stack.pop()
+                if expanded:
+                    order.append(person)
+                    continue
+                if visited[person]:
+                    continue
+                visited[person] = True
+                stack.append((person, True))
+                if not self.founder[person]:
+                    for parent in (self.mother[person], self.father[person]):
+                        if parent < self.count and not visited[parent]:
+                            stack.append((parent, False))
+        return order
+
+    def gene_distribution(self, genes, person):
+        """
+        Return, for each row of `genes`, the distribution of `person`'s
+        gene copies given their parents' copies in that row.
+        """
+        if self.founder[person]:
+            return np.broadcast_to(self.prior, (len(genes), 3))
+        return self.inheritance[:, genes[:, self.mother[person]], genes[:, self.father[person]]].T
+
+    def conditional(self, genes, person):
+        """
+        Return, for each row of `genes`, the distribution of `person`'s gene
+        copies given everyone else's copies and the known traits.
+        """
+        distribution = self.gene_distribution(genes, person) * self.evidence[person]
+        for child in self.children[person]:
+            copies = genes[:, child]
+            mother = np.broadcast_to(np.arange(3), (len(genes), 3)) if self.mother[child] == person \
+                else genes[:, self.mother[child], None]
+            father = np.broadcast_to(np.arange(3), (len(genes), 3)) if self.father[child] == person \
+                else genes[:, self.father[child], None]
+            distribution = distribution * self.inheritance[copies[:, None], mother, father]
+        return distribution / distribution.sum(axis=1, keepdims=True)
+
+
+def sample_copies(rng, distribution):
+    """
+    Return one draw of gene copies per row of `distribution`,
+    an array of probabilities of 0, 1 and 2 copies.
+    """
+    cumulative = np.cumsum(distribution, axis=1)
+    draws = rng.random(len(distribution)) * cumulative[:, 2]
+    return (draws >= cumulative[:, 0]).astype(np.int64) + (draws >= cumulative[:, 1])
+
+
+def gelman_rubin(chain_sums, chain_squares, sweeps):
+    """
+    Return the largest Gelman-Rubin potential scale reduction across all
+    people and gene copies, from each chain's sum and sum of squares of
+    `sweeps` values, ignoring quantities that never vary within a chain.
+    """
+    if sweeps < 2 or len(chain_sums) < 2:
+        return float("nan")
+    means = chain_sums / sweeps
+    within = ((chain_squares - sweeps * means ** 2) / (sweeps - 1)).mean(axis=0)
+    between = means.var(axis=0, ddof=1) * sweeps
+    varying = within > 1e-12
+    if not varying.any():
+        return 1.0
+    pooled = (sweeps - 1) / sweeps * within[varying] + between[varying] / sweeps
+    return float(np.sqrt(pooled / within[varying]).max())
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import batch
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+FAMILIES = ("family0", "family1", "family2")
+
+
+def family_inputs(tmp_path):
+    """
+    Copy the example families to `tmp_path`, with one more family the
+    exact engine cannot solve, as a person is their own parent.
+    """
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    for family in FAMILIES:
+        shutil.copy(os.path.join(DATA, f"{family}.csv"), inputs / f"{family}.csv")
+    (inputs / "unsolvable.csv").write_text("name,mother,father,trait\nAda,Ada,Ada,1\n")
+    return inputs
+
+
+def test_family_task_reports_memory_error(monkeypatch):
+    def exhaust(*args, **kwargs):
+        raise MemoryError("out of memory")
+    monkeypatch.setattr(batch, "compute_probabilities", exhaust)
+    probabilities, error = batch._family_task((os.path.join(DATA, "family0.csv"), "exact", 10, None))
+    assert probabilities is None
+    assert error == "MemoryError: out of memory"
+
+
+def test_unsolvable_family_does_not_stop_batch(tmp_path):
+    families = batch.find_families([str(family_inputs(tmp_path))])
+    output = tmp_path / "output"
+    report = batch.run_batch(families, str(output), workers=1)
+    assert (report["computed"], report["failed"]) == (3, 1)
+    for family in FAMILIES:
+        assert (output / f"{family}.json").exists()
+
+    cache = json.loads((output / batch.CACHE_NAME).read_text())
+    assert sorted(cache) == list(FAMILIES)
+    report = batch.run_batch(families, str(output), workers=1)
+    assert (report["computed"], report["skipped"], report["failed"]) == (0, 3, 1)
+
+
+def test_interrupted_batch_keeps_finished_families(tmp_path, monkeypatch):
+    families = batch.find_families([str(family_inputs(tmp_path))])
+    output = tmp_path / "output"
+    write_outputs = batch.write_outputs
+    written = []
+
+    def interrupt_after_first(*args, **kwargs):
+        if written:
+            raise KeyboardInterrupt
+        write_outputs(*args, **kwargs)
+        written.append(args[0])
+    monkeypatch.setattr(batch, "write_outputs", interrupt_after_first)
+    with pytest.raises(KeyboardInterrupt):
+        batch.run_batch(families, str(output), workers=1)
+
+    monkeypatch.setattr(batch, "write_outputs", write_outputs)
+    report = batch.run_batch(families, str(output), workers=1)
+    assert (report["computed"], report["skipped"], report["failed"]) == (2, 1, 1)
+
+
+def test_deterministic_engines_ignore_sampling_settings(tmp_path):
+    families = batch.find_families([os.path.join(DATA, f"{family}.csv") for family in FAMILIES])
+    output = str(tmp_path / "output")
+    batch.run_batch(families, output, "exact", workers=1, samples=10, seed=1)
+    report = batch.run_batch(families, output, "exact", workers=1, samples=20, seed=2)
+    assert report["skipped"] == 3
+
+    batch.run_batch(families, output, "gibbs", workers=1, samples=1000, seed=1)
+    report = batch.run_batch(families, output, "gibbs", workers=1, samples=1000, seed=2)
+    assert report["computed"] == 3
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from crawler import crawl_graph
+from linkgraph import LinkGraph
+from pagerank import DAMPING, crawl, parallel_sample_pagerank, sample_pagerank
+from solvers import SOLVERS, solve
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Engines that can be benchmarked, by name; crawl engines need an HTML corpus
+CRAWL_ENGINES = ("crawl", "crawl-tree")
+ENGINES = CRAWL_ENGINES + ("sample", "walkers") + SOLVERS
+
+# Tolerance on the total change of the power iteration used as the reference solution
+REFERENCE_TOLERANCE = 1e-12
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PageRank crawling, sampling and iteration.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="write a synthetic power-law web graph")
+    generate_parser.add_argument("output", help="directory of HTML pages, or link graph file with --format graph")
+    generate_parser.add_argument("--pages", type=int, default=10000)
+    generate_parser.add_argument("--links", type=float, default=8, help="mean number of links per page")
+    generate_parser.add_argument("--exponent", type=float, default=1.0, help="popularity exponent of link targets")
+    generate_parser.add_argument("--dangling", type=float, default=0.05, help="fraction of pages with no links")
+    generate_parser.add_argument("--format", choices=("html", "graph"), default="html")
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser("run", help="time engines on a corpus directory or link graph file")
+    run_parser.add_argument("corpus")
+    run_parser.add_argument("--engines", default="crawl-tree,walkers,power,quadratic",
+                            help=f"comma-separated engines out of {', '.join(ENGINES)}")
+    run_parser.add_argument("--samples", type=int, default=1000000)
+    run_parser.add_argument("--tolerance", type=float, default=1e-8, help="L1 change at which solvers stop")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--memory", action="store_true",
+                            help="also trace each engine's peak allocations, in a second untimed run")
+    run_parser.add_argument("--output", help="JSON file to save results to")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        graph = generate(args.pages, args.links, args.exponent, args.dangling, args.seed)
+        if args.format == "graph":
+            graph.save(args.output)
+        else:
+            write_html(graph, args.output)
+        print(f"Wrote {graph.num_pages} pages and {graph.num_links} links to {args.output}", file=sys.stderr)
+        return
+
+    engines = args.engines.split(",")
+    for engine in engines:
+        if engine not in ENGINES:
+            sys.exit(f"Unknown engine {engine}, expected one of {', '.join(ENGINES)}.")
+        if engine in CRAWL_ENGINES and not os.path.isdir(args.corpus):
+            sys.exit(f"Engine {engine} needs a directory of HTML pages.")
+    results = run(args.corpus, engines, args.samples, args.tolerance, args.seed, args.memory)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def generate(num_pages, mean_links, exponent, dangling, seed):
+    """
+    Return a random LinkGraph of `num_pages` pages, where a `dangling`
+    fraction of pages have no links and the rest have a geometric number of
+    links with mean `mean_links`. Link targets follow a power law, page i
+    being chosen with weight 1 / (i + 1) ** exponent, so a few pages
+    collect most links as on the web.
+    """
+    rng = np.random.default_rng(seed)
+    degree = rng.geometric(1 / max(mean_links, 1), size=num_pages)
+    degree[rng.random(num_pages) < dangling] = 0
+
+    weights = 1 / np.arange(1, num_pages + 1) ** exponent
+    targets = rng.choice(num_pages, size=int(degree.sum()), p=weights / weights.sum())
+    sources = np.repeat(np.arange(num_pages), degree)
+
+    # Drop links to the page itself and repeated links, keeping links grouped by source
+    keys = sources * num_pages + targets
+    keys = np.sort(keys[sources != targets])
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])] if len(keys) else keys
+    offsets = np.zeros(num_pages + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(keys // num_pages, minlength=num_pages))
+    width = len(str(max(num_pages - 1, 0)))
+    return LinkGraph([f"{i:0{width}d}.html" for i in range(num_pages)], offsets, keys % num_pages)
+
+
+def write_html(graph, directory):
+    """
+    Write each page of `graph` to `directory` as a small HTML file
+    linking to its pages, as found in corpus0-2.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for i, page in enumerate(graph.pages):
+        links = "".join(f'<li><a href="{graph.pages[link]}">{graph.pages[link]}</a></li>\n' for link in graph.links(i))
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html lang=\"en\">\n<head><title>{page}</title></head>\n"
+                    f"<body>\n<h1>{page}</h1>\n<ul>\n{links}</ul>\n</body>\n</html>\n")
+
+
+def run(corpus, engines, samples, tolerance, seed, memory=False):
+    """
+    Run each engine on `corpus` and return its wall time, iterations where
+    it iterates, and the L1 and largest per-page error of its ranks against
+    a tightly converged power iteration, as a JSON-serialisable dictionary.
+    With `memory`, each engine's peak traced allocations are added.
+    """
+    results = {
+        "corpus": corpus,
+        "samples": samples,
+        "tolerance": tolerance,
+        "seed": seed,
+        "python": platform.python_version()
+    }
+
+    start = time.perf_counter()
+    graph = LinkGraph.load(corpus) if os.path.isfile(corpus) else crawl_graph(corpus)
+    results["load_seconds"] = time.perf_counter() - start
+    results["pages"] = graph.num_pages
+    results["links"] = graph.num_links
+
+    start = time.perf_counter()
+    reference_stats = dict()
+    reference = solve(graph, DAMPING, "power", REFERENCE_TOLERANCE, 100000, stats=reference_stats, criterion="l1")
+    results["reference_seconds"] = time.perf_counter() - start
+    results["reference_iterations"] = reference_stats["iterations"]
+
+    results["engines"] = dict()
+    for engine in engines:
+        stats = dict()
+        start = time.perf_counter()
+        ranks = measure(engine, corpus, graph, samples, tolerance, seed, stats)
+        seconds = time.perf_counter() - start
+
+        entry = {"seconds": seconds}
+        if "iterations" in stats:
+            entry["iterations"] = stats["iterations"]
+        if ranks is not None:
+            entry["l1_error"] = float(np.abs(ranks - reference).sum())
+            entry["max_error"] = float(np.abs(ranks - reference).max())
+        if memory:
+            tracemalloc.start()
+            measure(engine, corpus, graph, samples, tolerance, seed, dict())
+            entry["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        results["engines"][engine] = entry
+
+    results["peak_rss_mb"] = peak_memory()
+    return results
+
+
+def measure(engine, corpus, graph, samples, tolerance, seed, stats):
+    """
+    Run one engine and return its ranks in page order, or None for crawls,
+    whose resulting graph is checked against `graph` instead.
+    """
+    if engine in CRAWL_ENGINES:
+        crawled = LinkGraph.from_corpus(crawl(corpus)) if engine == "crawl" else crawl_graph(corpus)
+        if crawled.pages != graph.pages or not np.array_equal(crawled.targets, graph.targets):
+            sys.exit(f"Engine {engine} crawled a different graph.")
+        return None
+    elif engine == "sample":
+        ranks = sample_pagerank(graph, DAMPING, samples, random.Random(seed))
+    elif engine == "walkers":
+        ranks, _ = parallel_sample_pagerank(graph, DAMPING, samples, seed=seed)
+    else:
+        return solve(graph, DAMPING, engine, tolerance, stats=stats, criterion="l1")
+    return np.array([ranks[page] for page in graph.pages])
+
+
+def peak_memory():
+    """
+    Return this process's peak resident memory in megabytes,
+    or None where it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import codecs
+import hashlib
+import os
+import posixpath
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from linkgraph import LinkGraph, decode_strings, encode_strings, read_sections
+
+# Same link pattern as pagerank.crawl
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Characters read from a file at a time, and the longest unfinished tag carried between reads
+CHUNK_SIZE = 1 << 16
+MAX_CARRY = 1 << 16
+
+# Pages handed to a worker at a time
+BATCH_SIZE = 256
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a tree of HTML pages into a link graph file.")
+    parser.add_argument("directory")
+    parser.add_argument("output", help="link graph file to write")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--processes", action="store_true", help="extract links in processes instead of threads")
+    parser.add_argument("--hash", action="store_true",
+                        help="also reuse pages whose modification time changed but whose content did not")
+    parser.add_argument("--full", action="store_true", help="ignore any existing output and crawl every page")
+    args = parser.parse_args()
+
+    graph, report = build_graph(args.directory, args.output, args.workers, args.processes, args.hash, args.full)
+    print(f"Saved {graph.num_pages} pages and {graph.num_links} links to {args.output} "
+          f"({report['parsed']} parsed, {report['reused']} reused)", file=sys.stderr)
+
+
+def find_pages(directory):
+    """
+    Return the paths of all HTML files under `directory`, recursively,
+    relative to it with "/" separators, in sorted order.
+    """
+    pages = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        relative = os.path.relpath(root, directory)
+        for filename in sorted(files):
+            if filename.endswith(".html"):
+                path = filename if relative == "." else os.path.join(relative, filename)
+                pages.append(path.replace(os.sep, "/"))
+    return pages
+
+
+def extract_links(directory, page):
+    """
+    Return the set of pages linked to by `page`, reading the file in chunks
+    so that memory use does not grow with file size. Links are resolved
+    relative to the page's own directory, which for a flat corpus leaves
+    them as plain file names.
+    """
+    return _scan(directory, page)[0]
+
+
+def _scan(directory, page):
+    """
+    Return (links, digest) for `page`, where digest is a 16-byte BLAKE2b
+    hash of the file's content, computed while reading it.
+    """
+    links = set()
+    carry = ""
+    digest = hashlib.blake2b(digest_size=16)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(os.path.join(directory, page), "rb") as f:
+        while True:
+            data = f.read(CHUNK_SIZE)
+            digest.update(data)
+            chunk = decoder.decode(data, final=not data)
+            text = carry + chunk
+            for match in LINK.finditer(text):
+                links.add(match.group(1))
+            if not data:
+                break
+
+            # Keep an unfinished tag at the end of the text for the next read
+            start = text.rfind("<")
+            if start != -1 and text.find(">", start) == -1 and len(text) - start <= MAX_CARRY:
+                carry = text[start:]
+            else:
+                carry = ""
+
+    folder = posixpath.dirname(page)
+    links = {posixpath.normpath(posixpath.join(folder, link)) if folder else link for link in links}
+    return links, digest.digest()
+
+
+def _extract_batch(directory, pages):
+    return [extract_links(directory, page) for page in pages]
+
+
+def _scan_batch(directory, pages):
+    return [_scan(directory, page) for page in pages]
+
+
+def _file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(data)
+    return digest.digest()
+
+
+def crawl_tree(directory, workers=None, processes=False):
+    """
+    Parse a tree of HTML pages and return a corpus dictionary like
+    pagerank.crawl, mapping each page (its path relative to `directory`)
+    to the set of other pages in the corpus it links to.
+
+    Files are read in batches by a pool of `workers` threads, or processes
+    if `processes` is true, since regex matching holds the GIL.
+    """
+    pages = find_pages(directory)
+    batches = [pages[i:i + BATCH_SIZE] for i in range(0, len(pages), BATCH_SIZE)]
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=workers) as pool:
+        results = pool.map(_extract_batch, [directory] * len(batches), batches)
+        links = [page_links for batch in results for page_links in batch]
+
+    # Only include links to other pages in the corpus
+    known = set(pages)
+    return {
+        page: {link for link in page_links if link in known and link != page}
+        for page, page_links in zip(pages, links)
+    }
+
+
+def crawl_graph(directory, workers=None, processes=False):
+    """
+    Crawl a tree of HTML pages with crawl_tree and return a LinkGraph.
+    """
+    return LinkGraph.from_corpus(crawl_tree(directory, workers, processes))
+
+
+def build_graph(directory, output, workers=None, processes=False, use_hash=False, full=False):
+    """
+    Crawl a tree of HTML pages into the link graph file `output` and
+    return (graph, report), reparsing only pages that changed since
+    `output` was last built unless `full` is true.
+
+    Besides the graph, the file records each page's size, modification
+    time, content hash and every link it contains, including links to
+    pages not (yet) in the corpus. A page is reused when its size and
+    modification time match, or with `use_hash`, when its content hash
+    matches despite a new modification time.
+    """
+    pages = sorted(find_pages(directory))
+    previous = None if full else _load_crawl(output)
+
+    # Decide which pages can keep their recorded links
+    stats = [os.stat(os.path.join(directory, page)) for page in pages]
+    links = [None] * len(pages)
+    digests = [None] * len(pages)
+    for i, (page, stat) in enumerate(zip(pages, stats)):
+        if previous is None or page not in previous:
+            continue
+        size, mtime, digest, page_links = previous[page]
+        if (size, mtime) == (stat.st_size, stat.st_mtime_ns) or (
+                use_hash and size == stat.st_size and _file_digest(os.path.join(directory, page)) == digest):
+            links[i], digests[i] = page_links, digest
+
+    # Parse the remaining pages in parallel
+    changed = [i for i in range(len(pages)) if links[i] is None]
+    batches = [changed[i:i + BATCH_SIZE] for i in range(0, len(changed), BATCH_SIZE)]
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=workers) as pool:
+        results = pool.map(_scan_batch, [directory] * len(batches), [[pages[i] for i in batch] for batch in batches])
+        for batch, scanned in zip(batches, results):
+            for i, (page_links, digest) in zip(batch, scanned):
+                links[i], digests[i] = page_links, digest
+
+    # Link targets are resolved against the current page set every build
+    index = {page: i for i, page in enumerate(pages)}
+    offsets = [0]
+    targets = []
+    for i, page_links in enumerate(links):
+        targets.extend(sorted(index[link] for link in page_links if link in index and index[link] != i))
+        offsets.append(len(targets))
+    graph = LinkGraph(pages, offsets, targets)
+
+    # Record what each page contained for the next incremental build
+    link_counts = np.zeros(len(pages) + 1, dtype=np.int64)
+    link_counts[1:] = np.cumsum([len(page_links) for page_links in links])
+    raw_offsets, raw_names = encode_strings([link for page_links in links for link in sorted(page_links)])
+    graph.save(output, {
+        "sizes": np.array([stat.st_size for stat in stats], dtype=np.int64),
+        "mtimes": np.array([stat.st_mtime_ns for stat in stats], dtype=np.int64),
+        "digests": np.frombuffer(b"".join(digests), dtype=np.uint8),
+        "link_counts": link_counts,
+        "link_name_offsets": raw_offsets,
+        "link_names": raw_names
+    })
+    return graph, {"pages": len(pages), "parsed": len(changed), "reused": len(pages) - len(changed)}
+
+
+def _load_crawl(path):
+    """
+    Return the crawl record of the link graph file at `path`, mapping each
+    page to (size, modification time, digest, set of links), or None if
+    there is no usable record.
+    """
+    try:
+        header, sections = read_sections(path, mmap=False)
+        pages = decode_strings(sections["name_offsets"], sections["names"])
+        sizes, mtimes = sections["sizes"].tolist(), sections["mtimes"].tolist()
+        digests = sections["digests"].tobytes()
+        link_counts = sections["link_counts"].tolist()
+        link_names = decode_strings(sections["link_name_offsets"], sections["link_names"])
+    except (OSError, ValueError, KeyError):
+        return None
+    return {
+        page: (sizes[i], mtimes[i], digests[i * 16:(i + 1) * 16], set(link_names[link_counts[i]:link_counts[i + 1]]))
+        for i, page in enumerate(pages)
+    }
+
+
+if __name__ == "__main__":
+    main()
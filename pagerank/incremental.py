@@ -0,0 +1,154 @@
+import numpy as np
+
+from linkgraph import LinkGraph
+from solvers import MAX_ITERATIONS, TOLERANCE, power_iteration
+
+# Ways update_ranks can bring a previous rank vector up to date
+METHODS = ("push", "warm")
+
+
+def apply_link_changes(graph, added=(), removed=()):
+    """
+    Return (new graph, moved) after adding and removing links of a
+    LinkGraph, each link a (source, target) pair of page names. Pages named
+    by added links that are not yet in the graph are added; links to a page
+    itself and links already present are ignored.
+
+    `moved` gives the new number of every page of the old graph, as adding
+    pages renumbers the pages after them in name order.
+    """
+    added = list(added)
+    removed = list(removed)
+    new_pages = {page for link in added for page in link if page not in graph.index}
+    if new_pages:
+        pages = sorted(graph.pages + list(new_pages))
+        index = {page: i for i, page in enumerate(pages)}
+        moved = np.array([index[page] for page in graph.pages], dtype=np.int64)
+    else:
+        pages, index = graph.pages, graph.index
+        moved = np.arange(graph.num_pages, dtype=np.int64)
+    n = len(pages)
+
+    # Encode every link as one integer, source * n + target, in the new numbering
+    keys = moved[graph.sources] * n + moved[graph.targets]
+    if removed:
+        drop = np.array([index[source] * n + index[target] for source, target in removed
+                         if source in index and target in index], dtype=np.int64)
+        keys = keys[~np.isin(keys, drop)]
+    if added:
+        extra = np.array([index[source] * n + index[target] for source, target in added
+                          if source != target], dtype=np.int64)
+        keys = np.concatenate([keys, extra])
+
+    # Sorted keys are the links grouped by source, targets in order; drop repeats
+    keys = np.sort(keys)
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])] if len(keys) else keys
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(keys // n, minlength=n))
+    return LinkGraph(pages, offsets, keys % n), moved
+
+
+def update_ranks(graph, ranks, damping_factor, added=(), removed=(), method="warm",
+                 tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, check=False, stats=None):
+    """
+    Return (new graph, new ranks) after links of a LinkGraph change, starting
+    from `ranks`, its PageRank vector before the change, rather than from
+    the uniform vector as iterate_pagerank does.
+
+    With "warm", power iteration is run from the previous ranks. With
+    "push", residuals are pushed from the previous ranks by push_ranks
+    until the total error is below `tolerance`.
+
+    If `stats` is a dictionary, the work done is stored in it. With `check`,
+    the ranks are also recomputed from scratch and the largest difference
+    from the update is stored as stats["error"].
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method}, expected one of {', '.join(METHODS)}")
+    if stats is None:
+        stats = dict()
+
+    new_graph, moved = apply_link_changes(graph, added, removed)
+    start = carry_ranks(new_graph, ranks, moved)
+    if method == "push":
+        new_ranks = push_ranks(new_graph, damping_factor, start, tolerance, max_iterations, stats)
+    else:
+        new_ranks = power_iteration(new_graph, damping_factor, tolerance, max_iterations, start, stats)
+
+    if check:
+        full = dict()
+        reference = power_iteration(new_graph, damping_factor, tolerance, max_iterations, stats=full)
+        stats["full_iterations"] = full["iterations"]
+        stats["error"] = float(np.abs(new_ranks - reference).max()) if len(reference) else 0.0
+    return new_graph, new_ranks
+
+
+def carry_ranks(graph, ranks, moved):
+    """
+    Return a starting rank vector for `graph` holding the old `ranks` at
+    the pages' new numbers `moved`, with each new page given 1 / N and the
+    whole vector scaled to sum to 1.
+    """
+    n = graph.num_pages
+    start = np.full(n, 1 / n) if n else np.zeros(0)
+    start[moved] = ranks
+    total = start.sum()
+    return start / total if total > 0 else start
+
+
+def push_ranks(graph, damping_factor, ranks, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, stats=None):
+    """
+    Return the PageRank vector of a LinkGraph by pushing residuals from
+    `ranks`, an estimate close to it.
+
+    The residual of a page is how much its rank would change in one step
+    of the PageRank formula. Each round, every page with a residual above
+    its share of the allowed total adds it to its rank and passes
+    `damping_factor` of it on to the pages it links to, or spreads it over
+    every page if it has no links. The L1 error of the ranks is at most the
+    total residual divided by 1 - `damping_factor`, so rounds stop once
+    that bound is below `tolerance`, or after `max_iterations` rounds.
+    Each round still scans every page, so this only beats power iteration
+    when few pages need pushing. If `stats` is a dictionary, the number of
+    rounds and of pages pushed are stored in it.
+    """
+    n = graph.num_pages
+    ranks = np.array(ranks, dtype=float)
+    if stats is not None:
+        stats["iterations"] = stats["pushes"] = 0
+    if n == 0:
+        return ranks
+
+    degree = graph.out_degree
+    starts = graph.offsets[:-1]
+    residual = (1 - damping_factor) / n + damping_factor * graph.propagate(ranks) - ranks
+    allowed = tolerance * (1 - damping_factor)
+
+    for iteration in range(1, max_iterations + 1):
+        if np.abs(residual).sum() <= allowed:
+            break
+        active = np.flatnonzero(np.abs(residual) > allowed / n)
+        pushed = residual[active]
+        ranks[active] += pushed
+        residual[active] = 0
+
+        # Pass each pushed residual along its page's links, gathering only those links
+        counts = degree[active]
+        linked = counts > 0
+        total = int(counts.sum())
+        if total:
+            first = np.repeat(starts[active] - np.cumsum(counts) + counts, counts)
+            links = graph.targets[first + np.arange(total)]
+            shares = np.repeat(damping_factor * pushed[linked] / counts[linked], counts[linked])
+            residual += np.bincount(links, weights=shares, minlength=n)
+
+        # Pages without links spread theirs over every page
+        dangling = pushed[~linked].sum()
+        if dangling:
+            residual += damping_factor * dangling / n
+
+        if stats is not None:
+            stats["iterations"] = iteration
+            stats["pushes"] += len(active)
+
+    return ranks
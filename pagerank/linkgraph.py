@@ -0,0 +1,203 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+# Link graph files start with this, followed by a JSON header and aligned arrays
+GRAPH_MAGIC = b"PRGRAPH1"
+
+
+class LinkGraph():
+    """
+    Link structure of a corpus with pages numbered 0..n-1 in sorted name order.
+
+    Out-links are stored in compressed sparse row form: the pages linked
+    to by page i are targets[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, pages, offsets, targets):
+        self.pages = list(pages)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self._index = None
+        self._sources = None
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a link graph from a corpus dictionary as returned by crawl,
+        mapping each page to the set of pages it links to.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        offsets = [0]
+        targets = []
+        for page in pages:
+            targets.extend(sorted(index[link] for link in corpus[page] if link in index))
+            offsets.append(len(targets))
+        return cls(pages, offsets, targets)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Read a link graph file written by save. With `mmap`, the link arrays
+        are memory-mapped rather than read, so loading costs only the page
+        names and processes ranking the same file share its pages in memory.
+        """
+        header, sections = read_sections(path, mmap)
+        pages = decode_strings(sections["name_offsets"], sections["names"])
+        return cls(pages, sections["offsets"], sections["targets"])
+
+    def save(self, path, extra=None):
+        """
+        Write the graph to a compact binary file: a JSON header, then
+        int64 link offsets, int32 link targets and a UTF-8 page name table,
+        plus any named arrays in `extra`, each at an 8-byte boundary.
+        """
+        name_offsets, names = encode_strings(self.pages)
+        arrays = {
+            "offsets": self.offsets,
+            "targets": self.targets,
+            "name_offsets": name_offsets,
+            "names": names
+        }
+        arrays.update(extra or {})
+        write_sections(path, {"pages": self.num_pages, "links": self.num_links}, arrays)
+
+    @property
+    def num_pages(self):
+        return len(self.pages)
+
+    @property
+    def num_links(self):
+        return len(self.targets)
+
+    @property
+    def index(self):
+        """
+        Dictionary mapping each page name to its number.
+        """
+        if self._index is None:
+            self._index = {page: i for i, page in enumerate(self.pages)}
+        return self._index
+
+    @property
+    def out_degree(self):
+        return np.diff(self.offsets)
+
+    @property
+    def sources(self):
+        """
+        Source page of every link, parallel to `targets`.
+        """
+        if self._sources is None:
+            self._sources = np.repeat(np.arange(self.num_pages, dtype=np.int32), self.out_degree)
+        return self._sources
+
+    def links(self, page):
+        """
+        Return the numbers of the pages linked to by page number `page`.
+        """
+        return self.targets[self.offsets[page]:self.offsets[page + 1]]
+
+    def to_corpus(self):
+        """
+        Return the graph as a corpus dictionary of page name to set of linked names.
+        """
+        return {
+            page: {self.pages[link] for link in self.links(i)}
+            for i, page in enumerate(self.pages)
+        }
+
+    def to_dict(self, values):
+        """
+        Return a dictionary mapping each page name to its entry in `values`.
+        """
+        return {page: float(value) for page, value in zip(self.pages, values)}
+
+    def propagate(self, ranks):
+        """
+        Return the rank each page receives by following links once from
+        `ranks`, with pages that have no links spreading theirs over every page.
+        """
+        degree = self.out_degree
+        linked = degree > 0
+        shares = np.zeros(self.num_pages)
+        shares[linked] = ranks[linked] / degree[linked]
+        received = np.bincount(self.targets, weights=shares[self.sources], minlength=self.num_pages)
+        return received + ranks[~linked].sum() / self.num_pages
+
+
+def encode_strings(strings):
+    """
+    Return (offsets, data) arrays holding `strings` as one UTF-8 blob,
+    string i being data[offsets[i]:offsets[i + 1]].
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(string) for string in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def decode_strings(offsets, data):
+    """
+    Return the list of strings stored by encode_strings.
+    """
+    data = data.tobytes()
+    offsets = offsets.tolist()
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def write_sections(path, header, arrays):
+    """
+    Write NumPy `arrays` to `path` after a JSON header extended with their
+    layout, each array little-endian and 8-byte aligned.
+    """
+    arrays = {name: np.ascontiguousarray(values).astype(values.dtype.newbyteorder("<")) for name, values in arrays.items()}
+
+    # Lay sections out at 8-byte aligned offsets after the header
+    layout = dict()
+    position = 0
+    for name, values in arrays.items():
+        position = _align(position)
+        layout[name] = [position, values.size, values.dtype.str]
+        position += values.nbytes
+    header = json.dumps(dict(header, sections=layout)).encode("utf-8")
+    data_start = _align(len(GRAPH_MAGIC) + 8 + len(header))
+
+    # Write to a temporary file and rename, so readers never see a partial graph
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(GRAPH_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, values in arrays.items():
+            f.seek(data_start + layout[name][0])
+            f.write(values.tobytes())
+    os.replace(temporary, path)
+
+
+def read_sections(path, mmap=True):
+    """
+    Return (header, arrays) from a file written by write_sections,
+    with the arrays memory-mapped read-only if `mmap` is true.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(GRAPH_MAGIC)) != GRAPH_MAGIC:
+            raise ValueError(f"{path} is not a link graph file")
+        header_length, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_length))
+    data_start = _align(len(GRAPH_MAGIC) + 8 + header_length)
+
+    sections = dict()
+    for name, (offset, count, dtype) in header["sections"].items():
+        if mmap and count:
+            sections[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + offset, shape=(count,))
+        else:
+            sections[name] = np.fromfile(path, dtype=dtype, count=count, offset=data_start + offset)
+    return header, sections
+
+
+def _align(position):
+    return (position + 7) // 8 * 8
@@ -0,0 +1,123 @@
+import math
+import multiprocessing
+
+import numpy as np
+
+# Walkers stepping together in each batch, and independent batches per estimate
+WALKERS = 1000
+BATCHES = 16
+
+# Largest L1 distance from PageRank allowed for walkers' positions once counting starts
+BURN_IN_TOLERANCE = 1e-4
+
+# Graph sampled by sample_batch in worker processes
+graph = None
+
+
+def sample_batch(graph, damping_factor, walkers, steps, seed, burn_in=0):
+    """
+    Run `walkers` independent random surfers for `steps` samples each,
+    all stepping together as NumPy arrays, and return the visit count of
+    every page. Walkers start on uniformly random pages, drawn like every
+    other choice from a generator seeded with `seed`, and take `burn_in`
+    uncounted steps first so their counts do not favour the start.
+    """
+    rng = np.random.default_rng(seed)
+    n = graph.num_pages
+    degree = graph.out_degree
+    offsets = graph.offsets[:-1]
+    counts = np.zeros(n, dtype=np.int64)
+    if n == 0 or walkers <= 0 or steps <= 0:
+        return counts
+
+    pages = rng.integers(n, size=walkers)
+    for step in range(burn_in + steps):
+
+        # Follow a random link with probability damping_factor, if the page has any
+        if step > 0:
+            links = degree[pages]
+            follow = (rng.random(walkers) < damping_factor) & (links > 0)
+            choice = offsets[pages] + (rng.random(walkers) * links).astype(np.int64)
+            jump = rng.integers(n, size=walkers)
+            if graph.num_links:
+                pages = np.where(follow, graph.targets[np.where(follow, choice, 0)], jump)
+            else:
+                pages = jump
+        if step >= burn_in:
+            np.add.at(counts, pages, 1)
+
+    return counts
+
+
+def _init_worker(shared_graph):
+    global graph
+    graph = shared_graph
+
+
+def _sample_task(task):
+    damping_factor, walkers, steps, seed, burn_in = task
+    return sample_batch(graph, damping_factor, walkers, steps, seed, burn_in)
+
+
+def burn_in_steps(damping_factor, tolerance=BURN_IN_TOLERANCE):
+    """
+    Return how many steps a surfer must take from a uniformly random page
+    before its position is within L1 distance `tolerance` of PageRank.
+    Only surfers that have followed a link at every step still remember
+    where they started, so the distance shrinks as damping_factor ** steps.
+    """
+    if damping_factor <= 0:
+        return 0
+    if damping_factor >= 1:
+        raise ValueError("Sampling needs a damping factor below 1.")
+    return math.ceil(math.log(tolerance) / math.log(damping_factor))
+
+
+def parallel_sample(link_graph, damping_factor, n, walkers=WALKERS, batches=BATCHES, workers=1, seed=None,
+                    stats=None):
+    """
+    Estimate PageRank of a LinkGraph from about `n` samples, split into
+    `batches` independent batches of `walkers` walkers with their own
+    seeds spawned from `seed`, run across `workers` processes. Each walker
+    takes burn_in_steps uncounted steps before counting at least one.
+
+    Returns (ranks, stderr) as NumPy arrays, where stderr is the standard
+    error of each page's rank estimated from the spread of batch means.
+    If `stats` is a dictionary, "samples" is set to the number of samples
+    counted, which exceeds `n` when it is not a multiple of
+    `batches` * `walkers`, and "burn_in" to the uncounted steps per walker.
+    """
+    steps = max(1, math.ceil(n / (batches * walkers)))
+    burn_in = burn_in_steps(damping_factor)
+    seeds = np.random.SeedSequence(seed).spawn(batches)
+    tasks = [(damping_factor, walkers, steps, child, burn_in) for child in seeds]
+    if stats is not None:
+        stats["samples"] = batches * walkers * steps
+        stats["burn_in"] = burn_in
+
+    if workers <= 1:
+        results = [sample_batch(link_graph, damping_factor, walkers, steps, child, burn_in) for child in seeds]
+    else:
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        context = multiprocessing.get_context(method)
+        with context.Pool(workers, initializer=_init_worker, initargs=(link_graph,)) as pool:
+            results = pool.map(_sample_task, tasks)
+
+    # Each batch gives an independent estimate; their spread gives the standard error
+    estimates = np.array(results, dtype=float) / (walkers * steps)
+    ranks = estimates.mean(axis=0)
+    if batches > 1:
+        stderr = estimates.std(axis=0, ddof=1) / math.sqrt(batches)
+    else:
+        stderr = np.full(link_graph.num_pages, np.nan)
+    return ranks, stderr
+
+
+def samples_for_precision(stderr, n, target):
+    """
+    Return roughly how many samples would bring the largest standard
+    error in `stderr`, measured with `n` samples, down to `target`,
+    since standard error shrinks with the square root of the sample count.
+    """
+    worst = float(np.nanmax(stderr)) if len(stderr) else 0.0
+    return math.ceil(n * (worst / target) ** 2)
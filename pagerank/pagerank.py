@@ -1,21 +1,76 @@
+import argparse
 import os
 import random
 import re
 import sys
 
+import numpy as np
+
+from incremental import update_ranks
+from linkgraph import LinkGraph
+from montecarlo import BATCHES, WALKERS, parallel_sample, samples_for_precision
+from personalized import EPSILON, forward_push, top_k
+from solvers import CRITERIA, MAX_ITERATIONS, SOLVERS, TOLERANCE, solve
+
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    parser = argparse.ArgumentParser(description="Rank the pages of a corpus by PageRank.")
+    parser.add_argument("corpus")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--walkers", type=int,
+                        help="sample with this many parallel walkers per batch, reporting standard errors")
+    parser.add_argument("--workers", type=int, default=1, help="processes for parallel walkers")
+    parser.add_argument("--seed", type=int, help="seed for parallel walkers")
+    parser.add_argument("--precision", type=float,
+                        help="report the samples needed for this standard error, with --walkers")
+    parser.add_argument("--solver", choices=SOLVERS, default="power", help="iteration method")
+    parser.add_argument("--criterion", choices=CRITERIA, default="max",
+                        help="stop iterating on the largest change of any page, or the total change")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--log", action="store_true", help="print the change after every iteration")
+    parser.add_argument("--top", type=int, help="only print this many of the highest ranked pages")
+    parser.add_argument("--personalize", action="append", metavar="PAGE",
+                        help="rank pages relative to this seed page, with --top; may be repeated")
+    args = parser.parse_args()
+
+    # A crawled link graph file can be ranked directly, without parsing HTML
+    if os.path.isfile(args.corpus):
+        corpus = LinkGraph.load(args.corpus)
+    else:
+        corpus = crawl(args.corpus)
+    if args.top:
+        seeds = args.personalize
+        print(f"Top {args.top} Pages by {'Personalized ' if seeds else ''}PageRank")
+        for page, rank in top_pagerank(corpus, DAMPING, args.top, seeds):
+            print(f"  {page}: {rank:.4f}")
+        return
+    if args.personalize:
+        sys.exit("--personalize needs --top")
+    samples = args.samples
+    if args.walkers:
+        sample_stats = dict()
+        ranks, stderr = parallel_sample_pagerank(corpus, DAMPING, samples, args.walkers, args.workers, args.seed,
+                                                 sample_stats)
+        samples = sample_stats["samples"]
+        print(f"PageRank Results from Sampling (n = {samples}, {args.walkers} walkers per batch)")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f} ± {stderr[page]:.4f}")
+        if args.precision:
+            needed = samples_for_precision(np.array(list(stderr.values())), samples, args.precision)
+            print(f"About {needed} samples needed for standard error {args.precision}")
+    else:
+        ranks = sample_pagerank(corpus, DAMPING, samples)
+        print(f"PageRank Results from Sampling (n = {samples})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+    stats = dict()
+    ranks = iterate_pagerank(corpus, DAMPING, args.tolerance, solver=args.solver, criterion=args.criterion, stats=stats)
+    if args.log:
+        for iteration, change in enumerate(stats["residuals"], 1):
+            print(f"Iteration {iteration}: {args.criterion} change {change:.3e}", file=sys.stderr)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
@@ -48,6 +103,16 @@ def crawl(directory):
     return pages
 
 
+def link_graph(corpus):
+    """
+    Return `corpus` as a LinkGraph, building one if it is a corpus dictionary.
+    The sampling and iteration functions accept either.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    return LinkGraph.from_corpus(corpus)
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -83,51 +148,78 @@ def transition_model(corpus, page, damping_factor):
     return transition_model_dict
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, rng=random):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
+    Random choices are drawn from `rng`, the random module by default.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # Initialise sample page count dictionary, where key is page and value is count of pages in all samples
-    pagecount_dict = dict()
+    # Build the link graph once, so each sample is a constant-time choice
+    graph = link_graph(corpus)
+    counts = sample_walk(graph, damping_factor, n, rng)
+    return graph.to_dict(np.array(counts) / n)
 
-    # Add page for every unique page in corpus and initialise count to zero
-    for key in corpus:
-        pagecount_dict[key] = 0
 
-    # Generate first sample by choosing from page at random
-    sample_page = random.choice(list(corpus.keys()))
+def sample_walk(graph, damping_factor, n, rng=random):
+    """
+    Return a list of how many of `n` random-surfer samples landed on each
+    page of a LinkGraph, starting from a page chosen at random with `rng`.
 
-    # Record first sample in sample page count dictionary
-    pagecount_dict[sample_page] += 1
+    Each step flips the damping coin and then picks either a uniform link
+    of the current page or a uniform page, which samples transition_model
+    exactly without building its distribution.
+    """
+    # Plain Python lists, as indexing NumPy arrays one item at a time is slow
+    num_pages = graph.num_pages
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    counts = [0] * num_pages
+    if n <= 0 or num_pages == 0:
+        return counts
+
+    random_float = rng.random
+
+    # Generate first sample by choosing from page at random
+    page = int(random_float() * num_pages)
+    counts[page] += 1
 
     # Loop and generate samples until sample population achieved
-    for i in range(n - 1):
+    for _ in range(n - 1):
+        start = offsets[page]
+        links = offsets[page + 1] - start
 
-        # Initialise previous sample's transition model dictionary
-        sample_transition_model = transition_model(corpus, sample_page, damping_factor)
+        # Follow a random link with probability damping_factor, if the page has any
+        if links and random_float() < damping_factor:
+            page = targets[start + int(random_float() * links)]
 
-        # Randomly generate new sample based on previous sample's transition model
-        sample_page = random.choices(list(sample_transition_model.keys()), weights=list(sample_transition_model.values()), k=1)[0]
+        # Otherwise jump to any page in the corpus at random
+        else:
+            page = int(random_float() * num_pages)
+        counts[page] += 1
 
-        # Record next sample in sample page count dictionary
-        pagecount_dict[sample_page] += 1
-    
-    # Initialise pagerank dictionary, where key is page and value is pagerank
-    pagerank_dict = dict()
+    return counts
 
-    # Add pagerank to pagerank dictionary for every page count in pagecount dictionary
-    for key in pagecount_dict:
-        pagerank_dict[key] = pagecount_dict[key] / n
-    
-    return pagerank_dict
+
+def parallel_sample_pagerank(corpus, damping_factor, n, walkers=WALKERS, workers=1, seed=None, stats=None):
+    """
+    Return (ranks, stderr) dictionaries for each page, estimated from about
+    `n` samples by independent batches of `walkers` random surfers stepping
+    together, with batches run across `workers` processes. Each batch has its
+    own generator spawned from `seed`, and `stderr` gives the standard error
+    of each page's estimate across batches. If `stats` is a dictionary, the
+    number of samples actually counted is stored in stats["samples"].
+    """
+    graph = link_graph(corpus)
+    ranks, stderr = parallel_sample(graph, damping_factor, n, walkers, BATCHES, workers, seed, stats)
+    return graph.to_dict(ranks), graph.to_dict(stderr)
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                     solver="power", criterion="max", stats=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -135,46 +227,72 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-    # Initialise current and new pagerank dictionaries, where key is page and value is pagerank
-    pagerank_dict = dict()
-    new_pagerank_dict = dict()
-    
-    # Assign each page a rank of 1 / N, where N is total number of pages in corpus
-    for key in corpus:
-        pagerank_dict[key] = 1 / len(corpus)
 
-    # Iterate until pagerank for all pages do not change more than 0.001
-    while True:
+    Iteration stops once no page changes by more than `tolerance`,
+    or after `max_iterations` iterations. Pages with no links are
+    treated as linking to every page in the corpus.
 
-        # Loop through unique pages and calculate pagerank of each page
-        for page in corpus:
+    `solver` and `criterion` choose the iteration and the measure of
+    change compared with `tolerance`, as for solvers.solve, which also
+    stores the change after every iteration in `stats` if it is a dictionary.
+    """
+    # Build the link graph once, then iterate over its arrays
+    graph = link_graph(corpus)
+    ranks = solve(graph, damping_factor, solver, tolerance, max_iterations, stats=stats, criterion=criterion)
+    return graph.to_dict(ranks)
 
-            # Loop through unique pages and sum up probability of links to current page
-            sum_probability_links = 0
-            for key in corpus:
-                if page in corpus[key]:
-                    sum_probability_links += pagerank_dict[key] / len(corpus[key])
 
-            # Calculate new pagerank using pagerank formula
-            new_pagerank_dict[page] = (1 - damping_factor) / len(corpus) + damping_factor * sum_probability_links
+def personalized_pagerank(corpus, damping_factor, seeds, epsilon=EPSILON):
+    """
+    Return personalized PageRank values relative to `seeds`, either a
+    collection of page names to teleport to with equal probability or a
+    dictionary of page names to teleport weights.
 
-        # Loop through unique pages to check if all pageranks convergent and update pageranks
-        convergent_count = 0
-        for page in corpus:
+    Return a dictionary of page names to PageRank values, holding only
+    the pages near the seeds that have any rank, computed by
+    personalized.forward_push to within `epsilon` per link.
+    """
+    graph = link_graph(corpus)
+    if not isinstance(seeds, dict):
+        seeds = {page: 1 for page in seeds}
+    for page in seeds:
+        if page not in graph.index:
+            raise ValueError(f"Seed {page} is not in the corpus")
+    ranks = forward_push(graph, damping_factor, {graph.index[page]: weight for page, weight in seeds.items()}, epsilon)
+    return {graph.pages[page]: rank for page, rank in ranks.items()}
 
-            # Check if new and previous pageranks do not differ by more than 0.001
-            if abs(new_pagerank_dict[page] - pagerank_dict[page]) <= 0.001:
-                convergent_count += 1
 
-            # Update new pageranks
-            pagerank_dict[page] = new_pagerank_dict[page]
-        
-        # If all pageranks convergent, break while loop
-        if convergent_count == len(corpus):
-            break
+def top_pagerank(corpus, damping_factor, k, seeds=None):
+    """
+    Return a list of the `k` pages with the highest PageRank, as (page, rank)
+    pairs from highest to lowest, personalized to `seeds` if given as for
+    personalized_pagerank. Only the top `k` are ever sorted.
+    """
+    graph = link_graph(corpus)
+    if seeds:
+        return top_k(personalized_pagerank(graph, damping_factor, seeds), k)
+    ranks = solve(graph, damping_factor)
+    return [(graph.pages[page], rank) for page, rank in top_k(ranks, k)]
 
-    return pagerank_dict
+
+def update_pagerank(corpus, ranks, damping_factor, added=(), removed=(), method="warm", check=False, stats=None):
+    """
+    Return (graph, ranks) after some links of `corpus` change, updating
+    `ranks`, the dictionary previously returned by iterate_pagerank,
+    instead of iterating from scratch. `added` and `removed` are collections
+    of (source, target) page names; `method` is "warm" or "push", as for
+    incremental.update_ranks.
+
+    The returned LinkGraph is the changed corpus, to pass in with the
+    returned ranks for the next update. If `stats` is a dictionary, the
+    work done is stored in it; with `check`, ranks are also recomputed in
+    full, with the iterations taken and largest difference stored as
+    stats["full_iterations"] and stats["error"].
+    """
+    graph = link_graph(corpus)
+    previous = np.array([ranks[page] for page in graph.pages])
+    graph, new_ranks = update_ranks(graph, previous, damping_factor, added, removed, method, check=check, stats=stats)
+    return graph, graph.to_dict(new_ranks)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+# Residual per link below which forward_push stops pushing a page
+EPSILON = 1e-6
+
+
+def forward_push(graph, damping_factor, seeds, epsilon=EPSILON, stats=None):
+    """
+    Return personalized PageRank of a LinkGraph as a dictionary from page
+    number to rank, holding only pages that received some rank.
+
+    `seeds` maps page numbers to teleport weights: the random surfer jumps
+    to a seed, chosen in proportion to its weight, instead of to any page.
+    A surfer on a page with no links also jumps back to the seeds, so rank
+    never leaves the seeds' neighbourhood.
+
+    Rank is computed by forward push, starting with all rank as residual on
+    the seeds and repeatedly moving a page's residual into its rank and on
+    along its links, until no page holds more than `epsilon` residual per
+    link. Only pages reached this way are ever touched. Ranks only ever
+    fall short, and by at most the residual left, `epsilon` per link of the
+    pages touched. If `stats` is a dictionary, the pushes made, the pages
+    touched and the residual left are stored in it.
+    """
+    total = sum(seeds.values())
+    if total <= 0:
+        raise ValueError("Seed weights must sum to more than 0")
+    teleport = {page: weight / total for page, weight in seeds.items() if weight > 0}
+    offsets = graph.offsets
+    targets = graph.targets
+
+    ranks = dict()
+    residual = dict(teleport)
+    queue = deque(residual)
+    queued = set(queue)
+    pushes = 0
+    while queue:
+        page = queue.popleft()
+        queued.discard(page)
+        start, end = int(offsets[page]), int(offsets[page + 1])
+        mass = residual[page]
+        if mass <= epsilon * max(end - start, 1):
+            continue
+
+        # Keep the teleporting share of the residual, and pass the rest on
+        pushes += 1
+        ranks[page] = ranks.get(page, 0.0) + (1 - damping_factor) * mass
+        residual[page] = 0.0
+        if end > start:
+            share = damping_factor * mass / (end - start)
+            receivers = [(link, share) for link in targets[start:end].tolist()]
+        else:
+            receivers = [(seed, damping_factor * mass * weight) for seed, weight in teleport.items()]
+
+        for link, amount in receivers:
+            residual[link] = residual.get(link, 0.0) + amount
+            degree = max(int(offsets[link + 1] - offsets[link]), 1)
+            if link not in queued and residual[link] > epsilon * degree:
+                queue.append(link)
+                queued.add(link)
+
+    if stats is not None:
+        stats["pushes"] = pushes
+        stats["touched"] = len(residual)
+        stats["residual"] = sum(residual.values())
+    return ranks
+
+
+def top_k(ranks, k):
+    """
+    Return the `k` highest (index, rank) pairs, highest first, from a NumPy
+    array or a dictionary of ranks, without sorting all of them.
+    """
+    if isinstance(ranks, dict):
+        return heapq.nlargest(k, ranks.items(), key=lambda item: item[1])
+    k = min(k, len(ranks))
+    if k <= 0:
+        return []
+    best = np.argpartition(ranks, len(ranks) - k)[len(ranks) - k:]
+    best = best[np.argsort(ranks[best], kind="stable")[::-1]]
+    return [(int(i), float(ranks[i])) for i in best]
@@ -0,0 +1,224 @@
+import numpy as np
+
+# Convergence threshold and iteration limit for iterate_pagerank
+TOLERANCE = 0.001
+MAX_ITERATIONS = 1000
+
+# Solvers and stopping criteria iterate_pagerank can use, by name
+SOLVERS = ("power", "gauss-seidel", "aitken", "quadratic")
+CRITERIA = ("max", "l1")
+
+# Blocks of pages updated in turn in one Gauss-Seidel sweep, and iterations between extrapolations
+BLOCKS = 64
+EXTRAPOLATION_PERIOD = 10
+
+
+def solve(graph, damping_factor, solver="power", tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+          ranks=None, stats=None, criterion="max"):
+    """
+    Return the PageRank vector of a LinkGraph with the named solver, out of
+    SOLVERS, stopping once the change in one iteration measured by
+    `criterion` is at most `tolerance`. See `residual` for the criteria.
+
+    If `stats` is a dictionary, the number of iterations is stored in it
+    as "iterations", and the change after every iteration as "residuals".
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver}, expected one of {', '.join(SOLVERS)}")
+    if criterion not in CRITERIA:
+        raise ValueError(f"Unknown criterion {criterion}, expected one of {', '.join(CRITERIA)}")
+    if solver == "power":
+        return power_iteration(graph, damping_factor, tolerance, max_iterations, ranks, stats, criterion)
+    elif solver == "gauss-seidel":
+        return gauss_seidel(graph, damping_factor, tolerance, max_iterations, ranks, stats, criterion)
+    return extrapolated_iteration(graph, damping_factor, tolerance, max_iterations, ranks, stats, criterion, solver)
+
+
+def residual(new_ranks, ranks, criterion="max"):
+    """
+    Return how much `new_ranks` differs from `ranks`: the largest change
+    of any page for "max", or the sum of all changes for "l1". The L1
+    change bounds the total rank still to move however many pages there are.
+    """
+    difference = np.abs(new_ranks - ranks)
+    return float(difference.max() if criterion == "max" else difference.sum())
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, ranks=None,
+                    stats=None, criterion="max"):
+    """
+    Return the PageRank vector of a LinkGraph as a NumPy array, by power
+    iteration from `ranks` (uniform if None) until the change in one
+    iteration is at most `tolerance`, or after `max_iterations` iterations.
+    If `stats` is a dictionary, the iterations and residuals are stored in it.
+    """
+    n = graph.num_pages
+    _start_stats(stats)
+    if n == 0:
+        return np.zeros(0)
+
+    # Assign each page a rank of 1 / N, where N is total number of pages in corpus
+    if ranks is None:
+        ranks = np.full(n, 1 / n)
+
+    for _ in range(max_iterations):
+
+        # Calculate new pageranks using pagerank formula, over all links at once
+        new_ranks = (1 - damping_factor) / n + damping_factor * graph.propagate(ranks)
+
+        # If all pageranks convergent, stop iterating
+        change = residual(new_ranks, ranks, criterion)
+        ranks = new_ranks
+        _record(stats, change)
+        if change <= tolerance:
+            break
+
+    return ranks
+
+
+def gauss_seidel(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, ranks=None,
+                 stats=None, criterion="max", blocks=BLOCKS):
+    """
+    Return the PageRank vector of a LinkGraph by block Gauss-Seidel
+    iteration: each sweep updates the pages in `blocks` blocks of
+    consecutive pages in turn, and later blocks already see the new ranks
+    of earlier ones. Graphs of at most `blocks` pages get one page per
+    block, which is textbook Gauss-Seidel.
+
+    Expect fewer sweeps than power iteration: a third to a half as many
+    on the small corpora, where every page is its own block, and about a
+    quarter fewer on large graphs. Each block is a separate NumPy step,
+    though, so a sweep of a large graph costs up to twice a power
+    iteration, and power iteration is usually as fast or faster in time.
+    """
+    n = graph.num_pages
+    _start_stats(stats)
+    if n == 0:
+        return np.zeros(0)
+    ranks = np.full(n, 1 / n) if ranks is None else np.array(ranks, dtype=float)
+    block_size = -(-n // max(1, blocks))
+
+    # Gather links by target, so each block pulls rank along a contiguous slice
+    order = np.argsort(graph.targets, kind="stable")
+    sources = graph.sources[order]
+    local = graph.targets[order] % block_size
+    in_offsets = np.zeros(n + 1, dtype=np.int64)
+    in_offsets[1:] = np.cumsum(np.bincount(graph.targets, minlength=n))
+    degree = graph.out_degree
+    dangling = degree == 0
+    inverse_degree = np.zeros(n)
+    inverse_degree[~dangling] = 1 / degree[~dangling]
+
+    for _ in range(max_iterations):
+        previous = ranks.copy()
+        shares = ranks * inverse_degree
+        dangling_rank = ranks[dangling].sum()
+
+        for start in range(0, n, block_size):
+            end = min(start + block_size, n)
+            first, last = in_offsets[start], in_offsets[end]
+            received = np.bincount(local[first:last], weights=shares[sources[first:last]], minlength=end - start)
+            block = (1 - damping_factor) / n + damping_factor * (received + dangling_rank / n)
+
+            # Later blocks see this block's new ranks
+            block_dangling = dangling[start:end]
+            dangling_rank += block[block_dangling].sum() - ranks[start:end][block_dangling].sum()
+            ranks[start:end] = block
+            shares[start:end] = block * inverse_degree[start:end]
+
+        # Updating in place does not keep the total at 1; restoring it avoids slow decay of the excess
+        ranks /= ranks.sum()
+        change = residual(ranks, previous, criterion)
+        _record(stats, change)
+        if change <= tolerance:
+            break
+
+    return ranks
+
+
+def extrapolated_iteration(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, ranks=None,
+                           stats=None, criterion="max", method="quadratic", period=EXTRAPOLATION_PERIOD):
+    """
+    Return the PageRank vector of a LinkGraph by power iteration, every
+    `period` iterations replacing the ranks with an extrapolation from the
+    last few iterates by `method`: "aitken" for Aitken's delta-squared per
+    page, or "quadratic" for quadratic extrapolation, which estimates and
+    removes the two slowest-decaying error components. This helps most on
+    graphs that mix slowly, where power iteration crawls.
+    """
+    n = graph.num_pages
+    _start_stats(stats)
+    if n == 0:
+        return np.zeros(0)
+    ranks = np.full(n, 1 / n) if ranks is None else np.array(ranks, dtype=float)
+    history = [ranks]
+    fallback = None
+
+    for iteration in range(1, max_iterations + 1):
+        new_ranks = (1 - damping_factor) / n + damping_factor * graph.propagate(ranks)
+        change = residual(new_ranks, ranks, criterion)
+        _record(stats, change)
+        if change <= tolerance:
+            return new_ranks
+
+        # Undo an extrapolation that made things worse, and carry on from before it
+        if fallback is not None:
+            previous_ranks, previous_change = fallback
+            fallback = None
+            if change > previous_change:
+                ranks = previous_ranks
+                history = [ranks]
+                continue
+
+        history = history[-3:] + [new_ranks]
+        if iteration % period == 0 and len(history) == 4:
+            extrapolated = aitken(*history[1:]) if method == "aitken" else quadratic_extrapolation(*history)
+            fallback = (new_ranks, change)
+            new_ranks = extrapolated
+            history = [new_ranks]
+        ranks = new_ranks
+
+    return ranks
+
+
+def aitken(x0, x1, x2):
+    """
+    Return Aitken's delta-squared extrapolation of three successive
+    iterates, page by page, keeping the latest iterate wherever the
+    second difference vanishes or the result would be negative.
+    """
+    first = x2 - x1
+    second = x2 - 2 * x1 + x0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        extrapolated = x2 - first * first / second
+    keep = (np.abs(second) < 1e-15) | ~np.isfinite(extrapolated) | (extrapolated < 0)
+    extrapolated[keep] = x2[keep]
+    return extrapolated / extrapolated.sum()
+
+
+def quadratic_extrapolation(x0, x1, x2, x3):
+    """
+    Return the quadratic extrapolation of four successive iterates
+    (Kamvar et al., 2003), scaled to sum to 1, or the latest iterate if
+    the result is not a usable rank vector.
+    """
+    y1, y2, y3 = x1 - x0, x2 - x0, x3 - x0
+    (gamma1, gamma2), *_ = np.linalg.lstsq(np.column_stack([y1, y2]), -y3, rcond=None)
+    gamma3 = 1.0
+    extrapolated = (gamma1 + gamma2 + gamma3) * x1 + (gamma2 + gamma3) * x2 + gamma3 * x3
+    total = extrapolated.sum()
+    if not np.isfinite(total) or total <= 0 or (extrapolated < 0).any():
+        return x3
+    return extrapolated / total
+
+
+def _start_stats(stats):
+    if stats is not None:
+        stats["iterations"] = 0
+        stats["residuals"] = []
+
+
+def _record(stats, change):
+    if stats is not None:
+        stats["iterations"] += 1
+        stats["residuals"].append(change)